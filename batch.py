@@ -0,0 +1,126 @@
+"""
+batch.py
+
+Generate unavoidable sets (and optionally mps files) for every grid of an instance file on a pool of worker processes.
+
+Every worker keeps one gurobi environment for all of its grids. The result of every grid is appended to a manifest
+in the output directory, so an interrupted run can be started again with the same arguments and skips the grids
+that are already done.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+import gurobipy as gp
+from instance import ProblemInstance
+from puzzle_file import read_instance_file
+from set_cache import SetCache
+
+_env = None
+
+
+def read_manifest(manifest_file):
+    """
+    Get the ids of all grids that the manifest records as done
+    """
+    done = set()
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as fp:
+            for line in fp:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut off if the previous run was killed while writing it
+                    continue
+                if record["status"] == "done":
+                    done.add(record["id"])
+                else:
+                    done.discard(record["id"])
+    return done
+
+
+def init_worker(threads):
+    """
+    Create the gurobi environment that the worker process uses for all of its grids
+    """
+    global _env
+    _env = gp.Env(empty=True)
+    _env.setParam("OutputFlag", 0)
+    _env.setParam("Threads", threads)
+    _env.start()
+
+
+def process_grid(task):
+    """
+    Generate the unavoidable sets (and the mps file) for one grid, return the manifest record
+    """
+    grid_id, grid, args = task
+    start = time.time()
+    record = {"id": grid_id, "grid": grid}
+    try:
+        instance = ProblemInstance(grid_id, args.size, args.size, args.size, args.size, env=_env)
+        if len(grid) != instance.n*instance.n:
+            raise ValueError(f'grid have invalid length {len(grid)}')
+        instance.fit(grid, solve=any(c == "." or instance.hex_to_num(c) > instance.n for c in grid))
+        if not instance.board.all():
+            raise ValueError("puzzle instance not solvable")
+        cut_dir = os.path.join(args.output, "unavoidable_sets")
+        cache = SetCache(args.cache, args.cache_size << 20) if args.cache else None
+        if cache is not None and instance.load_cached_cuts(cache, args.num_sets):
+            instance.save_cuts(os.path.join(cut_dir, f'{grid_id}.cuts'))
+            instance.write_cached_data(os.path.join(cut_dir, f'{grid_id}.data.csv'))
+            record["cached"] = True
+        else:
+            instance.generate_cuts(n_cuts=args.num_sets, cut_file=os.path.join(cut_dir, f'{grid_id}.cuts'),
+                                   data_file=os.path.join(cut_dir, f'{grid_id}.data.csv'), pool_size=args.pool_size,
+                                   pattern_size=args.pattern_size, symmetry=args.symmetry, resume=True)
+            if cache is not None:
+                instance.store_cached_cuts(cache)
+        record["sets"] = len(instance.cuts)
+        if args.mps_sets:
+            instance.cuts = instance.cuts[:args.mps_sets]
+            instance.create_problem_instance_files(os.path.join(args.output, "mps_files"), with_cuts=True)
+        record["status"] = "done"
+    except Exception:
+        record["status"] = "failed"
+        record["error"] = traceback.format_exc(limit=3)
+    record["elapsed"] = time.time() - start
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i","--instance_file",type=str, required=True, help="The instance file with one grid or puzzle per line")
+    parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
+    parser.add_argument("-n","--num_sets",type=int, required=True, help="The number of unavoidable sets to be generated per grid")
+    parser.add_argument("-m","--mps_sets",type=int, required=False, help="Also generate the mps and aux file with this many unavoidable sets", default=0)
+    parser.add_argument("-p","--pool_size",type=int, required=False, help="The number of unavoidable sets harvested from the solution pool of a single solve", default=1)
+    parser.add_argument("-t","--pattern_size",type=int, required=False, help="Insert unavoidable sets up to this size found by pattern enumeration before the ILP starts, 0 disables it", default=0)
+    parser.add_argument("-y","--symmetry",action="store_true", help="Add the orbit of every new set under the automorphism group of the grid")
+    parser.add_argument("-w","--workers",type=int, required=False, help="The number of worker processes", default=1)
+    parser.add_argument("--threads",type=int, required=False, help="The number of gurobi threads of every worker", default=1)
+    parser.add_argument("-a","--cache",type=str, required=False, help="A directory caching the sets of every grid by its canonical form, shared by all workers")
+    parser.add_argument("--cache_size",type=int, required=False, help="The size limit of the cache in megabytes", default=1024)
+    parser.add_argument("-o","--output",type=str, required=True, help="The output directory. Output will be generated in <OUTPUT>/unavoidable_sets and <OUTPUT>/mps_files")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(args.output, "unavoidable_sets"), exist_ok=True)
+    os.makedirs(os.path.join(args.output, "mps_files"), exist_ok=True)
+    manifest_file = os.path.join(args.output, "manifest.jsonl")
+    done = read_manifest(manifest_file)
+    print(f'Skipping {len(done)} grids that are already done')
+    start = time.time()
+    tasks = ((grid_id, grid, args) for grid_id, grid in read_instance_file(args.instance_file) if grid_id not in done)
+    count = {"done": 0, "failed": 0}
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.threads,)) as pool, \
+            open(manifest_file, "a") as manifest:
+        for record in pool.imap_unordered(process_grid, tasks):
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+            os.fsync(manifest.fileno())
+            count[record["status"]] += 1
+            print(f'{record["status"]} grid {record["id"]} in {record["elapsed"]:.2f} s', flush=True)
+    print(f'Batch done. {count["done"]} done, {count["failed"]} failed. Elapsed Time {time.time() - start:.2f} s')
@@ -0,0 +1,171 @@
+"""
+benchmark.py
+
+Benchmark the unavoidable set generation, mps generation and cut verification on the instances of the paper. The
+results are written to a json file and compared against a stored baseline, the script exits with a nonzero status if
+a metric got worse than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from instance import ProblemInstance
+from logging_helper import Telemetry
+from puzzle_file import read_instance_file
+
+# (instance file, subgrid size, ids, number of sets, reference file prefix)
+TIERS = {
+    "quick": [("instances/selected-instance-for-paper.txt", 3, ["0", "1", "2"], 500, "9x9")],
+    "full": [("instances/selected-instance-for-paper.txt", 3, ["0", "1", "2", "3", "4"], 5000, "9x9"),
+             ("instances/selected-instance-for-paper-16by16.txt", 4, ["0", "1"], 5000, "16x16")],
+}
+# Metrics where a larger value is a regression, and where a smaller value is
+LOWER_IS_BETTER = ["generation_time", "latency_p50", "latency_p90", "latency_p99", "mps_time", "verify_time",
+                   "peak_rss_mb"]
+HIGHER_IS_BETTER = ["sets_per_second"]
+
+
+def reference_runtime(prefix, grid_id, n_sets):
+    """
+    Get the gurobi runtime of the first n_sets solves of the paper's generation run for the grid, None if there is no
+    reference for it
+    """
+    reference_file = f'computational_result/unavoidable_sets_generation/{prefix}_{grid_id}.csv'
+    if not os.path.exists(reference_file):
+        return None
+    return float(pd.read_csv(reference_file, nrows=n_sets)["runtime"].sum())
+
+
+def peak_rss_mb():
+    """
+    Get the peak resident set size of this process in megabytes. The maximum is kept over the lifetime of the process,
+    so every grid runs in its own process
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def run_grid(grid_id, grid, size, n_sets, prefix, work_dir):
+    """
+    Generate n_sets unavoidable sets of a grid, write its mps file and verify its sets, return the measured metrics. Run
+    in a fresh process (see run_grid_process) for the peak RSS to belong to this grid alone
+    """
+    instance = ProblemInstance(f'{prefix}_{grid_id}', size, size, size, size)
+    instance.fit(grid)
+    latencies = []
+    last = {"wall_time": 0.0, "sets": 0}
+
+    def set_latency(record):
+        """
+        Spread the wall clock time of a solve over the sets it found
+        """
+        new_sets = record["sets"] - last["sets"]
+        if new_sets > 0:
+            latencies.extend([(record["wall_time"] - last["wall_time"]) / new_sets]*new_sets)
+        last.update(wall_time=record["wall_time"], sets=record["sets"])
+
+    start = time.perf_counter()
+    instance.generate_cuts(n_cuts=n_sets, cut_file=os.path.join(work_dir, f'{instance.instance_name}.cuts'),
+                           data_file=os.path.join(work_dir, f'{instance.instance_name}.data.csv'),
+                           telemetry=Telemetry(hooks=[set_latency]))
+    generation_time = time.perf_counter() - start
+    start = time.perf_counter()
+    instance.create_problem_instance_files(work_dir, with_cuts=True)
+    mps_time = time.perf_counter() - start
+    start = time.perf_counter()
+    instance.check_cuts()
+    verify_time = time.perf_counter() - start
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies else (None, None, None)
+    return {
+        "sets": len(instance.cuts),
+        "generation_time": generation_time,
+        "sets_per_second": len(instance.cuts) / generation_time,
+        "latency_p50": p50,
+        "latency_p90": p90,
+        "latency_p99": p99,
+        "mps_time": mps_time,
+        "verify_time": verify_time,
+        "peak_rss_mb": peak_rss_mb(),
+        "reference_gurobi_runtime": reference_runtime(prefix, grid_id, n_sets),
+    }
+
+
+def run_grid_process(*args):
+    """
+    Run run_grid in a newly spawned process, a forked process would start with the memory of the earlier grids
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_grid, args)
+
+
+def compare(results, baseline, threshold):
+    """
+    Get a message for every metric of results that is worse than the baseline by more than the threshold (a fraction)
+    """
+    regressions = []
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            new, old = metrics.get(metric), baseline[key].get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append(f'{key} {metric}: {old:.4g} -> {new:.4g} ({100*change:+.1f}% worse)')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tier",type=str, required=False, choices=sorted(TIERS), help="The set of grids and the number of sets to run", default="quick")
+    parser.add_argument("-b","--baseline",type=str, required=False, help="The baseline file to compare against. Defaults to ./benchmarks/<TIER>.baseline.json")
+    parser.add_argument("--threshold",type=float, required=False, help="The relative change of a metric counted as regression", default=0.2)
+    parser.add_argument("--save_baseline",action="store_true", help="Store the results as the new baseline instead of comparing")
+    parser.add_argument("-o","--output",type=str, required=False, help="The result file. Defaults to ./benchmarks/<TIER>.json")
+    args = parser.parse_args()
+
+    os.makedirs("./benchmarks", exist_ok=True)
+    baseline_file = args.baseline or f'./benchmarks/{args.tier}.baseline.json'
+    output_file = args.output or f'./benchmarks/{args.tier}.json'
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for instance_file, size, ids, n_sets, prefix in TIERS[args.tier]:
+            grids = dict(read_instance_file(instance_file))
+            for grid_id in ids:
+                key = f'{prefix}_{grid_id}_{n_sets}'
+                print(f'Benchmarking {key}', flush=True)
+                results[key] = run_grid_process(grid_id, grids[grid_id], size, n_sets, prefix, work_dir)
+                print(json.dumps(results[key]), flush=True)
+    report = {"tier": args.tier, "platform": platform.platform(), "cpu_type": platform.processor(),
+              "python": platform.python_version(), "results": results}
+    with open(output_file, "w") as fp:
+        json.dump(report, fp, indent=2)
+    print(f'Results written to {output_file}')
+    if args.save_baseline:
+        with open(baseline_file, "w") as fp:
+            json.dump(report, fp, indent=2)
+        print(f'Baseline written to {baseline_file}')
+        sys.exit(0)
+    if not os.path.exists(baseline_file):
+        print(f'No baseline {baseline_file}, run with --save_baseline to create one')
+        sys.exit(0)
+    with open(baseline_file) as fp:
+        baseline = json.load(fp)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f'Regression {regression}')
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
@@ -7,15 +7,16 @@ file determining which variables and constraints belongs to the lower level prog
 import gurobipy as gp
 from gurobipy import GRB
 import os
+from mps_writer import write_aux
 
 class BilevelModel:
 
-    def __init__(self, instance_name):
+    def __init__(self, instance_name, env=None):
         """
-        Create a new bilevel model. Instantiate a gurobi model and additional varibles to store bilevel related information
+        Create a new bilevel model. Instantiate a gurobi model (in env if given) and additional varibles to store bilevel related information
         """
         self.instance_name = instance_name
-        self.model = gp.Model(self.instance_name)
+        self.model = gp.Model(self.instance_name, env=env)
         self.lower_level_constraints_index = []
         self.lower_level_variables_index = []
         self.lower_level_objective_coefficient = []
@@ -91,6 +92,30 @@ class BilevelModel:
         self.model.update()
         self.lower_level_constraints_index.append(count_before)
 
+    def add_upper_level_matrix_constraints(self, A, x, sense, b, names=None):
+        """
+        Add upper level constraints A x (sense) b, a wrap around gurobi matrix interface. Constraints are named by names if given
+        """
+        constrs = self.model.addMConstr(A, x, sense, b)
+        if names is not None:
+            self.model.update()
+            self.model.setAttr("ConstrName", constrs.tolist(), names)
+        return constrs
+
+    def add_lower_level_matrix_constraints(self, A, x, sense, b, names=None):
+        """
+        Add lower level constraints A x (sense) b through the gurobi matrix interface and store bilevel specific information
+        """
+        count_before = self.model.getAttr("NumConstrs")
+        constrs = self.model.addMConstr(A, x, sense, b)
+        self.model.update()
+        if names is not None:
+            self.model.setAttr("ConstrName", constrs.tolist(), names)
+        count_after = self.model.getAttr("NumConstrs")
+        for i in range(count_before, count_after):
+            self.lower_level_constraints_index.append(i)
+        return constrs
+
     def set_upper_level_objective(self, *args, **kwargs):
         """
         Set upper level objective
@@ -114,15 +139,5 @@ class BilevelModel:
         """
         self.model.write(mps_file)
         with open(aux_file, 'w') as f:
-            f.write(f'N {len(self.lower_level_variables_index)}\n')
-            f.write(f'M {len(self.lower_level_constraints_index)}\n')
-            for i in self.lower_level_variables_index:
-                f.write(f'LC {i}\n')
-            for i in self.lower_level_constraints_index:
-                f.write(f'LR {i}\n')
-            for i in self.lower_level_objective_coefficient:
-                f.write(f'LO {i}\n')
-            if self.lower_level_objective_sense == GRB.MAXIMIZE:
-                f.write('OS -1')
-            else:
-                f.write('OS 1')
\ No newline at end of file
+            write_aux(f, self.lower_level_variables_index, self.lower_level_constraints_index,
+                      self.lower_level_objective_coefficient, -1 if self.lower_level_objective_sense == GRB.MAXIMIZE else 1)
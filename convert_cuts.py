@@ -0,0 +1,16 @@
+"""
+convert_cuts.py
+
+Convert a legacy pickled cut file into the binary cut format.
+"""
+import argparse
+from cut_store import convert_pickle
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-c","--cut_file",type=str, required=True, help="The pickled cut file to be converted")
+parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
+parser.add_argument("-o","--output",type=str, required=True, help="The path of the converted cut file")
+args = parser.parse_args()
+
+count = convert_pickle(args.cut_file, args.output, args.size*args.size)
+print(f'Converted {count} unavoidable sets into {args.output}')
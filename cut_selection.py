@@ -0,0 +1,125 @@
+"""
+cut_selection.py
+
+Choose which unavoidable sets of a cut file go into the bilevel model. The first sets of a file are the smallest ones
+and tend to cluster on the same cells, the strategies below pick subsets that spread over the board instead. All of
+them work on the (sets, n*n) boolean bitset matrix of cut_store.load_bitsets and return the indices of the chosen sets
+in the order they were chosen.
+
+ - first: the first k sets
+ - coverage: greedy, every step takes the set whose cells are covered least by the sets taken so far
+ - diverse: farthest point sampling, every step takes the set with the largest Jaccard distance to the sets taken
+ - capped: smallest first, skipping sets that contain a cell already covered cap times
+"""
+import numpy as np
+
+STRATEGIES = ["first", "coverage", "diverse", "capped"]
+
+
+def select_first(bitsets, k):
+    return np.arange(min(k, len(bitsets)))
+
+
+def select_coverage(bitsets, k):
+    """
+    Greedy cell coverage. A cell covered by c chosen sets has weight 1/(1+c), the gain of a set is the mean weight of
+    its cells and every step takes the set with the largest gain (the first one on ties). Choosing a set only changes
+    the weights of its cells, so only the gains of the sets sharing one of these cells are updated. Every step still
+    touches all sets sharing a cell with the chosen one, choosing 3000 of 50000 9x9 sets takes about one to two seconds
+    """
+    if len(bitsets) == 0 or k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    sizes = bitsets.sum(axis=1)
+    cells = np.split(np.nonzero(bitsets)[1], np.cumsum(sizes)[:-1])
+    # The sets containing each cell and their inverse sizes
+    cell_sets, set_index = np.nonzero(bitsets.T)
+    sets_of_cell = np.split(set_index, np.searchsorted(cell_sets, np.arange(1, bitsets.shape[1])))
+    inverse_size = 1.0 / np.maximum(sizes, 1)
+    weights_of_cell = [inverse_size[members] for members in sets_of_cell]
+    covered = np.zeros(bitsets.shape[1])
+    gain = np.ones(len(bitsets))
+    chosen = []
+    while len(chosen) < min(k, len(bitsets)):
+        index = int(np.argmax(gain))
+        chosen.append(index)
+        for cell in cells[index].tolist():
+            change = 1.0/(2.0 + covered[cell]) - 1.0/(1.0 + covered[cell])
+            covered[cell] += 1
+            gain[sets_of_cell[cell]] += change * weights_of_cell[cell]
+        gain[index] = -np.inf
+    return np.array(chosen, dtype=np.int64)
+
+
+def popcount(words):
+    """
+    Count the set bits of every uint64 word
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return np.unpackbits(words.view(np.uint8)).reshape(*words.shape, 64).sum(axis=-1)
+
+
+def select_diverse(bitsets, k):
+    """
+    Farthest point sampling under the Jaccard distance, starting from the first set. The sets are packed into uint64
+    words so every step is one AND and popcount per word over all candidates
+    """
+    if len(bitsets) == 0 or k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    width = (bitsets.shape[1] + 63) // 64
+    packed = np.zeros((len(bitsets), width*8), dtype=np.uint8)
+    packed[:, :(bitsets.shape[1] + 7) // 8] = np.packbits(bitsets, axis=1)
+    # One contiguous array per word
+    words = [np.ascontiguousarray(column) for column in packed.view(np.uint64).T]
+    sizes = bitsets.sum(axis=1).astype(np.float32)
+    distance = np.full(len(bitsets), np.inf, dtype=np.float32)
+    chosen = [0]
+    while len(chosen) < min(k, len(bitsets)):
+        last = chosen[-1]
+        common = popcount(words[0] & words[0][last]).astype(np.float32)
+        for word in words[1:]:
+            common += popcount(word & word[last])
+        np.minimum(distance, 1.0 - common / (sizes + sizes[last] - common), out=distance)
+        distance[last] = -1.0
+        chosen.append(int(np.argmax(distance)))
+    return np.array(chosen, dtype=np.int64)
+
+
+def select_capped(bitsets, k, cap):
+    """
+    Take the sets smallest first (keeping the file order among equal sizes) but skip a set if one of its cells is
+    already covered by cap chosen sets. If fewer than k sets pass, the skipped ones fill up the rest in the same order
+    """
+    sizes = bitsets.sum(axis=1)
+    order = np.argsort(sizes, kind="stable")
+    cells = np.split(np.nonzero(bitsets)[1], np.cumsum(sizes)[:-1])
+    covered = np.zeros(bitsets.shape[1], dtype=np.int64)
+    chosen = []
+    skipped = []
+    for index in order.tolist():
+        if len(chosen) >= k:
+            break
+        if covered[cells[index]].max(initial=0) >= cap:
+            skipped.append(index)
+            continue
+        chosen.append(index)
+        covered[cells[index]] += 1
+    chosen += skipped[:k - len(chosen)]
+    return np.array(chosen, dtype=np.int64)
+
+
+def select_cuts(bitsets, k, strategy="first", cap=None):
+    """
+    Get the indices of k sets chosen by a strategy, cap is the per cell limit of the capped strategy
+    """
+    if strategy == "first":
+        return select_first(bitsets, k)
+    if strategy == "coverage":
+        return select_coverage(bitsets, k)
+    if strategy == "diverse":
+        return select_diverse(bitsets, k)
+    if strategy == "capped":
+        if cap is None:
+            raise ValueError("the capped strategy needs a cell cap")
+        return select_capped(bitsets, k, cap)
+    raise ValueError(f'unknown selection strategy {strategy}')
@@ -0,0 +1,127 @@
+"""
+cut_store.py
+
+Binary storage for unavoidable sets. A cut file starts with a 16 byte header
+
+    magic (8 bytes)  b"SUDCUTS\0"
+    version (uint16, little endian)
+    n (uint16) the side length of the board
+    row_bytes (uint32) the number of bytes per set, that is ceil(n*n/8)
+
+followed by one fixed width row per set. Row bit i*n+j (numpy packbits order) is set if cell (i, j) is in the set.
+The number of sets follows from the file size, so sets can be appended without touching the header and a prefix of
+the file can be read through a memory map.
+"""
+import os
+import pickle
+import struct
+
+import numpy as np
+
+MAGIC = b"SUDCUTS\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+
+
+def row_bytes(n):
+    return (n*n + 7) // 8
+
+
+def is_cut_store(path):
+    """
+    Check if a file is in the binary cut format (and not a legacy pickle)
+    """
+    with open(path, "rb") as fp:
+        return fp.read(len(MAGIC)) == MAGIC
+
+
+def read_header(path):
+    """
+    Read the header of a cut file, return the side length n and the number of complete rows
+    """
+    with open(path, "rb") as fp:
+        magic, version, n, width = HEADER.unpack(fp.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a cut file of version {VERSION}')
+    count = (os.path.getsize(path) - HEADER.size) // width
+    return n, count
+
+
+def cuts_to_bitsets(cuts, n):
+    """
+    Convert a list of cuts given as (i, j) cells into a boolean matrix with one row per cut
+    """
+    bitsets = np.zeros(shape=(len(cuts), n*n), dtype=bool)
+    for row, cut in enumerate(cuts):
+        for i, j in cut:
+            bitsets[row, i*n+j] = True
+    return bitsets
+
+
+def bitsets_to_cuts(bitsets, n):
+    """
+    Convert a boolean matrix with one row per cut back into lists of (i, j) cells
+    """
+    return [[divmod(int(cell), n) for cell in np.flatnonzero(row)] for row in bitsets]
+
+
+def write_cuts(path, cuts, n):
+    """
+    Write a complete cut file, replacing any existing file
+    """
+    with open(path, "wb") as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, n, row_bytes(n)))
+        fp.write(np.packbits(cuts_to_bitsets(cuts, n), axis=1).tobytes())
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def append_cuts(path, cuts, n):
+    """
+    Append cuts to a cut file, creating it if it does not exist. A partially written row at the end of the file is
+    dropped before appending. The file is synced to disk before returning
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        write_cuts(path, cuts, n)
+        return
+    stored_n, count = read_header(path)
+    if stored_n != n:
+        raise ValueError(f'{path} holds cuts for a board of size {stored_n}, not {n}')
+    with open(path, "r+b") as fp:
+        fp.truncate(HEADER.size + count*row_bytes(n))
+        fp.seek(0, os.SEEK_END)
+        fp.write(np.packbits(cuts_to_bitsets(cuts, n), axis=1).tobytes())
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def load_bitsets(path, count=None):
+    """
+    Memory map the packed rows of the first count sets (all sets if count is None), return the side length and a
+    (count, n*n) boolean matrix. Only the mapped prefix of the file is read
+    """
+    n, stored = read_header(path)
+    if count is None or count > stored:
+        count = stored
+    if count == 0:
+        return n, np.zeros(shape=(0, n*n), dtype=bool)
+    packed = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size, shape=(count, row_bytes(n)))
+    return n, np.unpackbits(packed, axis=1, count=n*n).astype(bool)
+
+
+def read_cuts(path, count=None):
+    """
+    Read the first count sets (all sets if count is None) as lists of (i, j) cells
+    """
+    n, bitsets = load_bitsets(path, count)
+    return bitsets_to_cuts(bitsets, n)
+
+
+def convert_pickle(source, target, n):
+    """
+    Convert a legacy pickled list of cuts into the binary cut format
+    """
+    with open(source, "rb") as fp:
+        cuts = pickle.load(fp)
+    write_cuts(target, cuts, n)
+    return len(cuts)
@@ -0,0 +1,72 @@
+"""
+dominance.py
+
+Filter unavoidable sets that contain another stored set. Such a set gives a hitting set row that is implied by the
+row of the smaller set, so it only makes the model larger.
+
+The sets are kept in a trie over their sorted cells. A query for a subset of S only walks the branches whose cells all
+lie in S, so its cost depends on the number of stored prefixes inside S instead of on the number of stored sets.
+"""
+
+
+class SubsetIndex:
+
+    def __init__(self):
+        """
+        Create an empty index. Every trie node is a dict from cell to child node, the key None marks a stored set
+        """
+        self.root = {}
+        self.size = 0
+
+    def add(self, cut):
+        """
+        Store a set given as a list of (i, j) cells
+        """
+        node = self.root
+        for cell in sorted(cut):
+            node = node.setdefault(cell, {})
+        if None not in node:
+            node[None] = True
+            self.size += 1
+
+    def has_subset(self, cut):
+        """
+        Check if a stored set is a subset of (or equal to) the given set
+        """
+        cells = sorted(cut)
+        stack = [(self.root, 0)]
+        while stack:
+            node, start = stack.pop()
+            if None in node:
+                return True
+            for k in range(start, len(cells)):
+                child = node.get(cells[k])
+                if child is not None:
+                    stack.append((child, k+1))
+        return False
+
+    def add_if_minimal(self, cut):
+        """
+        Store a set unless it contains a stored set, return whether it was stored
+        """
+        if self.has_subset(cut):
+            return False
+        self.add(cut)
+        return True
+
+
+def filter_dominated(cuts):
+    """
+    Drop every set that contains another set of the list (of two equal sets the first is kept). The order of the
+    remaining sets is preserved. Return the remaining sets and the number of sets dropped for every size
+    """
+    index = SubsetIndex()
+    keep = [False]*len(cuts)
+    pruned = {}
+    # Smaller sets go first so a set only has to be checked against sets that are already stored
+    for k in sorted(range(len(cuts)), key=lambda k: len(cuts[k])):
+        if index.add_if_minimal(cuts[k]):
+            keep[k] = True
+        else:
+            pruned[len(cuts[k])] = pruned.get(len(cuts[k]), 0) + 1
+    return [cut for cut, kept in zip(cuts, keep) if kept], pruned
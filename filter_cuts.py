@@ -0,0 +1,31 @@
+"""
+filter_cuts.py
+
+Drop the unavoidable sets of a cut file that contain another set of the file.
+"""
+import argparse
+import pandas as pd
+from cut_store import is_cut_store, read_cuts, write_cuts
+from dominance import filter_dominated
+import pickle
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-c","--cut_file",type=str, required=True, help="The cut file to be filtered")
+parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
+parser.add_argument("-o","--output",type=str, required=True, help="The path of the filtered cut file")
+parser.add_argument("-d","--data_file",type=str, required=False, help="Write the number of kept and pruned sets per cut size into this csv file")
+args = parser.parse_args()
+
+if is_cut_store(args.cut_file):
+    cuts = read_cuts(args.cut_file)
+else:
+    with open(args.cut_file, "rb") as fp:
+        cuts = pickle.load(fp)
+kept, pruned = filter_dominated(cuts)
+write_cuts(args.output, kept, args.size*args.size)
+print(f'Kept {len(kept)} of {len(cuts)} unavoidable sets, pruned {len(cuts)-len(kept)} dominated sets')
+if args.data_file:
+    sizes = sorted({len(cut) for cut in cuts})
+    pd.DataFrame([{"cut_size": size,
+                   "kept_sets": sum(len(cut) == size for cut in kept),
+                   "pruned_sets": pruned.get(size, 0)} for size in sizes]).to_csv(args.data_file, index=False)
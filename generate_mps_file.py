@@ -7,6 +7,7 @@ import argparse
 import time
 from instance import ProblemInstance
 import os
+from cut_selection import STRATEGIES
 
 parser = argparse.ArgumentParser()
 parser.add_argument("-g","--grid",type=str, required=True, help="The sudoku grid for which the mps file needs to be generated")
@@ -14,6 +15,14 @@ parser.add_argument("-n","--num_sets",type=int, required=True, help="The number
 parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
 parser.add_argument("-c","--cut_file",type=str, required=True, help="The name of the cut file which contain the unavoidable set. The script will use ./unavoidable_sets/<CUT_FILE>.cuts")
 parser.add_argument("-o","--output",type=str, required=True, help="The name of the output. Output will be generated in ./mps_files")
+parser.add_argument("--writer",type=str, required=False, choices=["stream", "gurobi"], help="Write the files directly (stream) or through the gurobi model (gurobi)", default="stream")
+parser.add_argument("--select",type=str, required=False, choices=STRATEGIES, help="How the sets are chosen from the candidates, see cut_selection.py", default="first")
+parser.add_argument("--candidates",type=int, required=False, help="The number of sets of the cut file the selection chooses from, all sets by default", default=None)
+parser.add_argument("--cell_cap",type=int, required=False, help="The number of chosen sets a cell may be in with the capped selection", default=None)
+parser.add_argument("--start",action="store_true", help="Also write a start solution (.mst) and bounds (.bounds.json) from the hitting set heuristics")
+parser.add_argument("--heuristic_time",type=float, required=False, help="The time limit of the local search of the heuristics in seconds", default=10.0)
+parser.add_argument("-y","--symmetry",action="store_true", help="Add symmetry breaking constraints for the automorphisms of the grid")
+parser.add_argument("-z","--gzip",action="store_true", help="Write the mps file gzip compressed")
 args = parser.parse_args()
 
 print(f'Generating Instance File for grid {args.grid}')
@@ -21,6 +30,11 @@ if not os.path.exists("./mps_files"):
     os.mkdir("./mps_files")
 instance = ProblemInstance(f'{args.output}', args.size, args.size, args.size, args.size)
 instance.fit(args.grid)
-instance.load_cuts(f'./unavoidable_sets/{args.cut_file}.cuts',args.num_sets)
+if args.select == "first":
+    instance.load_cuts(f'./unavoidable_sets/{args.cut_file}.cuts',args.num_sets)
+else:
+    instance.load_cuts(f'./unavoidable_sets/{args.cut_file}.cuts',args.candidates)
+    instance.select_cuts(args.num_sets, args.select, args.cell_cap)
 instance.check_cuts()
-instance.create_problem_instance_files('./mps_files',with_cuts=True)
\ No newline at end of file
+instance.create_problem_instance_files('./mps_files',with_cuts=True,with_lower_bound=args.start,writer=args.writer,
+                                      compress=args.gzip,heuristic_time=args.heuristic_time,symmetry=args.symmetry)
\ No newline at end of file
@@ -6,21 +6,71 @@ Generate MPS file for the bilevel solver once the unavoidable sets are generated
 import argparse
 import time
 from instance import ProblemInstance
+from logging_helper import Telemetry
+from mps_writer import BilevelInstanceWriter
+from set_cache import SetCache
 import os
 
-parser = argparse.ArgumentParser()
-parser.add_argument("-g","--grid",type=str, required=True, help="The sudoku grid for which unavoidable sets need to be generated")
-parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
-parser.add_argument("-n","--num_sets",type=int, required=True, help="The number of unavoidable sets to be generated")
-parser.add_argument("-o","--output",type=str, required=True, help="The name of the output. Output will be generated in ./unavoidable_sets/<OUTPUT_NAME>")
-args = parser.parse_args()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-g","--grid",type=str, required=True, help="The sudoku grid for which unavoidable sets need to be generated")
+    parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
+    parser.add_argument("-n","--num_sets",type=int, required=True, help="The number of unavoidable sets to be generated")
+    parser.add_argument("-p","--pool_size",type=int, required=False, help="The number of unavoidable sets harvested from the solution pool of a single solve", default=1)
+    parser.add_argument("-t","--pattern_size",type=int, required=False, help="Insert unavoidable sets up to this size found by pattern enumeration before the ILP starts, 0 disables it", default=0)
+    parser.add_argument("-y","--symmetry",action="store_true", help="Add the orbit of every new set under the automorphism group of the grid")
+    parser.add_argument("-w","--workers",type=int, required=False, help="The number of worker processes, more than one splits every cut size into one task per board row", default=1)
+    parser.add_argument("-b","--block_size",type=int, required=False, help="First enumerate the unavoidable sets up to this size inside every pair of bands and every pair of stacks, 0 disables it", default=0)
+    parser.add_argument("-k","--checkpoint",type=int, required=False, help="Append the new sets to the cut file every CHECKPOINT sets (default 1000), with more than one worker every round is appended")
+    parser.add_argument("-r","--resume",action="store_true", help="Continue an interrupted run from the sets stored in ./unavoidable_sets/<OUTPUT_NAME>.cuts")
+    parser.add_argument("-j","--telemetry",action="store_true", help="Write one json record with the phase times of every solve to ./unavoidable_sets/<OUTPUT_NAME>.telemetry.jsonl")
+    parser.add_argument("--profile",action="store_true", help="Run the generation under cProfile and write the stats to ./unavoidable_sets/<OUTPUT_NAME>.prof")
+    parser.add_argument("--trace_memory",action="store_true", help="Add the peak memory traced by tracemalloc to every telemetry record")
+    parser.add_argument("-m","--mps_checkpoints",type=int, nargs="+", required=False, help="Write ./mps_files/<OUTPUT_NAME>_<K>.mps and .aux with the first K sets as soon as K sets exist, for every given K", default=[])
+    parser.add_argument("-z","--gzip",action="store_true", help="Write the mps files gzip compressed")
+    parser.add_argument("-a","--cache",type=str, required=False, help="A directory caching the sets of every grid by its canonical form, equivalent grids reuse them without any solve")
+    parser.add_argument("--cache_size",type=int, required=False, help="The size limit of the cache in megabytes", default=1024)
+    parser.add_argument("-o","--output",type=str, required=True, help="The name of the output. Output will be generated in ./unavoidable_sets/<OUTPUT_NAME>")
+    args = parser.parse_args()
+    if args.workers > 1:
+        # The parallel generation checkpoints after every round and has no per solve loop to record or orbits to add
+        unsupported = [flag for flag, given in [("-y", args.symmetry), ("-k", args.checkpoint is not None),
+                                                ("-j", args.telemetry), ("--profile", args.profile),
+                                                ("--trace_memory", args.trace_memory)] if given]
+        if unsupported:
+            parser.error(f'{", ".join(unsupported)} cannot be combined with more than one worker')
+    if args.checkpoint is None:
+        args.checkpoint = 1000
 
-start = time.time()
-print(f'Generating Unavoidable Sets for grid {args.grid}')
-if not os.path.exists("./unavoidable_sets"):
-    os.mkdir("./unavoidable_sets")
-instance = ProblemInstance(f'{args.grid}', args.size, args.size, args.size, args.size)
-instance.fit(args.grid)
-instance.generate_cuts(n_cuts=args.num_sets,data_file=f'./unavoidable_sets/{args.output}.data.csv',
-    cut_file=f'./unavoidable_sets/{args.output}.cuts')
-print(f'Generation done. Elapsed Time {time.time() - start:.2f} s')
+    start = time.time()
+    print(f'Generating Unavoidable Sets for grid {args.grid}')
+    if not os.path.exists("./unavoidable_sets"):
+        os.mkdir("./unavoidable_sets")
+    if args.mps_checkpoints and not os.path.exists("./mps_files"):
+        os.mkdir("./mps_files")
+    instance = ProblemInstance(f'{args.output}', args.size, args.size, args.size, args.size)
+    instance.fit(args.grid)
+    cache = SetCache(args.cache, args.cache_size << 20) if args.cache else None
+    if cache is not None and instance.load_cached_cuts(cache, args.num_sets):
+        instance.save_cuts(f'./unavoidable_sets/{args.output}.cuts')
+        instance.write_cached_data(f'./unavoidable_sets/{args.output}.data.csv')
+        if args.mps_checkpoints:
+            instance.write_checkpoint_instances(BilevelInstanceWriter(instance.geometry, instance.given_variables()),
+                                                sorted(args.mps_checkpoints), "./mps_files", args.gzip)
+    elif args.workers > 1:
+        instance.generate_cuts_parallel(n_cuts=args.num_sets,data_file=f'./unavoidable_sets/{args.output}.data.csv',
+            cut_file=f'./unavoidable_sets/{args.output}.cuts', workers=args.workers, pool_size=args.pool_size,
+            pattern_size=args.pattern_size, resume=args.resume, mps_checkpoints=args.mps_checkpoints,
+            mps_directory="./mps_files", compress=args.gzip, block_size=args.block_size)
+    else:
+        telemetry = Telemetry(telemetry_file=f'./unavoidable_sets/{args.output}.telemetry.jsonl' if args.telemetry else None,
+                              profile=f'./unavoidable_sets/{args.output}' if args.profile else None,
+                              trace_memory=args.trace_memory)
+        instance.generate_cuts(n_cuts=args.num_sets,data_file=f'./unavoidable_sets/{args.output}.data.csv',
+            cut_file=f'./unavoidable_sets/{args.output}.cuts', pool_size=args.pool_size,
+            pattern_size=args.pattern_size, symmetry=args.symmetry, checkpoint_every=args.checkpoint,
+            resume=args.resume, telemetry=telemetry, mps_checkpoints=args.mps_checkpoints,
+            mps_directory="./mps_files", compress=args.gzip, block_size=args.block_size)
+    if cache is not None:
+        instance.store_cached_cuts(cache)
+    print(f'Generation done. Elapsed Time {time.time() - start:.2f} s')
@@ -0,0 +1,57 @@
+"""
+geometry.py
+
+The cell layout of a board geometry (sub_matrix_width, sub_matrix_height, board_width, board_height). The row, column
+and box of every cell and the cells of every unit are computed once per geometry as numpy arrays and shared by the
+model builders, the bitmask solver and the cut extraction.
+
+Cells are numbered row by row, cell (i, j) has the flat index i*n + j. Boxes are numbered row by row as well, the box
+of cell (i, j) is (i // sub_matrix_height)*board_width + j // sub_matrix_width.
+"""
+import functools
+
+import numpy as np
+
+
+class Geometry(tuple):
+    """
+    A (sub_matrix_width, sub_matrix_height, board_width, board_height) tuple with the precomputed cell layout. It
+    compares and hashes like the plain tuple and is pickled as one, so it can be used wherever a geometry tuple is
+    expected
+    """
+
+    def __new__(cls, sub_matrix_width, sub_matrix_height, board_width, board_height):
+        return super().__new__(cls, (sub_matrix_width, sub_matrix_height, board_width, board_height))
+
+    def __init__(self, sub_matrix_width, sub_matrix_height, board_width, board_height):
+        self.sub_matrix_width = sub_matrix_width
+        self.sub_matrix_height = sub_matrix_height
+        self.board_width = board_width
+        self.board_height = board_height
+        self.n = n = sub_matrix_width * board_width
+        cells = np.arange(n*n)
+        self.cell_row = cells // n
+        self.cell_col = cells % n
+        self.cell_box = (self.cell_row // sub_matrix_height)*board_width + self.cell_col // sub_matrix_width
+        # The cells of every row, column and box, one unit per row of the array
+        self.units = np.concatenate([cells.reshape(n, n), cells.reshape(n, n).T,
+                                     np.argsort(self.cell_box, kind="stable").reshape(n, n)])
+        for array in (self.cell_row, self.cell_col, self.cell_box, self.units):
+            array.setflags(write=False)
+
+    def __reduce__(self):
+        return board_geometry, tuple(self)
+
+    def given_variables(self, board):
+        """
+        Get the flat index of the variable X[i,j,k] of the digit k+1 that board holds in every cell (i, j)
+        """
+        return np.arange(self.n*self.n)*self.n + np.asarray(board, dtype=np.int64).ravel() - 1
+
+
+@functools.lru_cache(maxsize=None)
+def board_geometry(sub_matrix_width=3, sub_matrix_height=3, board_width=3, board_height=3):
+    """
+    Get the shared Geometry of a board
+    """
+    return Geometry(sub_matrix_width, sub_matrix_height, board_width, board_height)
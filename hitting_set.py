@@ -0,0 +1,145 @@
+"""
+hitting_set.py
+
+Heuristics for the minimum clue problem over a list of unavoidable sets. Every uniquely solvable clue set hits every
+unavoidable set, so lower bounds of the hitting set problem over the sets are lower bounds on the number of clues, and
+a hitting set that the bitmask solver confirms to be unique is a feasible clue set.
+
+The sets are given as the (sets, n*n) boolean bitset matrix of cut_store and clue sets as arrays of flat cells.
+"""
+import time
+
+import numpy as np
+import scipy.optimize
+import scipy.sparse as sp
+
+
+def greedy_hitting_set(bitsets, clues=()):
+    """
+    Extend clues by the cell hitting the most unhit sets until every set is hit
+    """
+    clues = list(clues)
+    unhit = ~bitsets[:, clues].any(axis=1) if clues else np.ones(len(bitsets), dtype=bool)
+    while unhit.any():
+        cell = int(np.argmax(bitsets[unhit].sum(axis=0)))
+        clues.append(cell)
+        unhit &= ~bitsets[:, cell]
+    return clues
+
+
+def alternative_solution_cut(solver, board, clues):
+    """
+    Get the unavoidable set missed by a clue set, the cells where a second solution of the clues differs from the
+    board, as a boolean row. None if the clues determine the board
+    """
+    grid = np.zeros(len(board), dtype=np.int64)
+    grid[clues] = board[clues]
+    solutions = solver.find_solutions(grid, limit=2)
+    if len(solutions) < 2:
+        return None
+    other = next(np.array(s) for s in solutions if s != board.tolist())
+    return other != board
+
+
+def unique_hitting_set(solver, board, bitsets):
+    """
+    Find a clue set that determines the board. The greedy hitting set of the sets is repaired by adding the unavoidable
+    set that a second solution reveals and extending the greedy solution, until the solution is unique. Return the
+    clues and the sets extended by the revealed ones
+    """
+    clues = greedy_hitting_set(bitsets)
+    while True:
+        cut = alternative_solution_cut(solver, board, clues)
+        if cut is None:
+            return clues, bitsets
+        bitsets = np.vstack([bitsets, cut[None, :]])
+        clues = greedy_hitting_set(bitsets, clues)
+
+
+def local_search(solver, board, bitsets, clues, time_limit=10.0):
+    """
+    Improve a unique clue set by drop moves (remove one clue) and swap moves (replace two clues by one) that keep every
+    set hit and the board unique, until no move improves or the time limit is reached
+    """
+    start = time.time()
+    clues = list(clues)
+    improved = True
+    while improved and time.time() - start < time_limit:
+        improved = False
+        hits = bitsets[:, clues].sum(axis=1)
+        # Try to drop the clues that are needed by the fewest sets first
+        needed = [int(np.sum(bitsets[hits == 1, cell])) for cell in clues]
+        for k in np.argsort(needed, kind="stable").tolist():
+            if needed[k] == 0:
+                candidate = clues[:k] + clues[k+1:]
+                if alternative_solution_cut(solver, board, candidate) is None:
+                    clues = candidate
+                    improved = True
+                    break
+        if improved:
+            continue
+        for a in range(len(clues)):
+            for b in range(a+1, len(clues)):
+                if time.time() - start >= time_limit:
+                    return clues
+                rest = clues[:a] + clues[a+1:b] + clues[b+1:]
+                unhit = ~bitsets[:, rest].any(axis=1)
+                # The replacing cell has to hit every set that only a or b hit
+                cells = np.flatnonzero(bitsets[unhit].all(axis=0))
+                for cell in np.setdiff1d(cells, clues).tolist():
+                    if alternative_solution_cut(solver, board, rest + [cell]) is None:
+                        clues = rest + [cell]
+                        improved = True
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+    return clues
+
+
+def disjoint_sets_bound(bitsets):
+    """
+    Count a family of pairwise disjoint sets, taken smallest first. Every clue set needs one clue in each of them
+    """
+    used = np.zeros(bitsets.shape[1], dtype=bool)
+    count = 0
+    for row in np.argsort(bitsets.sum(axis=1), kind="stable").tolist():
+        if not (bitsets[row] & used).any():
+            used |= bitsets[row]
+            count += 1
+    return count
+
+
+def lp_bound(bitsets):
+    """
+    Get the optimal value of the LP relaxation of the hitting set problem
+    """
+    if len(bitsets) == 0:
+        return 0.0
+    result = scipy.optimize.linprog(np.ones(bitsets.shape[1]), A_ub=-sp.csr_matrix(bitsets, dtype=float),
+                                    b_ub=-np.ones(len(bitsets)), bounds=(0, 1), method="highs")
+    return float(result.fun) if result.status == 0 else 0.0
+
+
+def hitting_set_bounds(solver, board, bitsets, time_limit=10.0):
+    """
+    Run the heuristics, return the best clue set found and a dict of the bounds. The lower bound is the larger of the
+    rounded up LP bound and the disjoint sets bound, both taken over the sets and the sets revealed on the way
+    """
+    start = time.time()
+    clues, extended = unique_hitting_set(solver, board, bitsets)
+    greedy = len(clues)
+    clues = local_search(solver, board, extended, clues, time_limit)
+    lp = lp_bound(extended)
+    disjoint = disjoint_sets_bound(extended)
+    return sorted(clues), {
+        "lower_bound": max(int(np.ceil(lp - 1e-6)), disjoint),
+        "upper_bound": len(clues),
+        "greedy_clues": greedy,
+        "lp_bound": lp,
+        "disjoint_sets_bound": disjoint,
+        "cut_count": len(bitsets),
+        "revealed_sets": len(extended) - len(bitsets),
+        "runtime": time.time() - start,
+    }
@@ -3,18 +3,33 @@ instances.py
 
 Convert a sudoku instance into models
 """
+import itertools
+import json
+import multiprocessing
 import os.path
 import pickle
+import platform
 import sys
 import time
 
 import gurobipy as gp
 import numpy as np
-import pandas as pd
+import scipy.sparse as sp
 from logging_helper import *
 from gurobipy import GRB
 import random
 from bilevel import BilevelModel
+from sudoku_solver import BitmaskSolver
+from patterns import find_pattern_sets, COMPLETE_SIZE as PATTERN_COMPLETE_SIZE
+from symmetry import grid_automorphisms, cut_orbit, canonical_form, symmetry_breaking_pairs, lex_leader
+from cut_store import is_cut_store, read_cuts, write_cuts, append_cuts, cuts_to_bitsets
+from dominance import SubsetIndex
+from cut_selection import select_cuts
+from hitting_set import hitting_set_bounds
+from model_template import sudoku_model, sudoku_constraint_blocks
+from mps_writer import write_bilevel_instance, BilevelInstanceWriter
+from puzzle_file import parse_grids
+from geometry import board_geometry
 
 
 class ProblemInstance:
@@ -24,39 +39,107 @@ class ProblemInstance:
                  sub_matrix_width=3,
                  sub_matrix_height=3,
                  board_width=3,
-                 board_height=3):
+                 board_height=3,
+                 env=None):
         """
-        Initiate a model and set some meta parameter of the model. The metaparameters are submatrix and board sizes 
+        Initiate a model and set some meta parameter of the model. The metaparameters are submatrix and board sizes.
+        All gurobi models of the instance are created in env, or in the default environment if env is None
         """
         self.sub_matrix_height = sub_matrix_height
         self.sub_matrix_width = sub_matrix_width
         self.board_height = board_height
         self.board_width = board_width
         self.instance_name = instance_name
+        self.env = env
         self.n = self.sub_matrix_width * self.board_width
+        self.geometry = board_geometry(self.sub_matrix_width, self.sub_matrix_height, self.board_width, self.board_height)
         self.cuts = []
         self.puzzle = []
         self.current_solution = []
-        self.board = np.zeros(shape=(self.n, self.n))
+        self.board = np.zeros(shape=(self.n, self.n), dtype=np.uint8)
         self.hitting_set_lower_bound = 0
+        self.solver = BitmaskSolver(*self.geometry)
     
     def hex_to_num(self, hex):
         arr = "_123456789ABCDEF0"
         return arr.index(str(hex))
 
+    def num_to_hex(self, num):
+        arr = "_123456789ABCDEF0"
+        return arr[num]
+
     def load_cuts(self, cut_file, n):
         """
-        Get a set of unavoidable set cut from a cut file
+        Get the first n unavoidable set cuts from a cut file. Legacy pickled cut files are still read
         """
-        with open(cut_file, "rb") as fp:
-            self.cuts = pickle.load(fp)[:n]
+        if is_cut_store(cut_file):
+            self.cuts = read_cuts(cut_file, n)
+        else:
+            with open(cut_file, "rb") as fp:
+                self.cuts = pickle.load(fp)[:n]
+
+    def select_cuts(self, n, strategy="first", cell_cap=None):
+        """
+        Keep n of the loaded cuts chosen by a strategy of cut_selection
+        """
+        chosen = select_cuts(cuts_to_bitsets(self.cuts, self.n), n, strategy, cell_cap)
+        self.cuts = [self.cuts[index] for index in chosen.tolist()]
 
     def save_cuts(self, target):
         """
         Write generated unavoidable set cut into a cut file
         """
-        with open(target, "wb") as fp:
-            pickle.dump(self.cuts, fp)
+        write_cuts(target, self.cuts, self.n)
+
+    def append_cuts(self, target, start):
+        """
+        Append the cuts from index start onwards to a cut file
+        """
+        append_cuts(target, self.cuts[start:], self.n)
+
+    def resume_cuts(self, cut_file, data_file):
+        """
+        Reload the sets of an interrupted generation run from its cut file and drop a partially written line at the
+        end of its data file. Return the size of the last stored set, the size to continue from, or 0 if there is
+        nothing to resume
+        """
+        if not os.path.exists(cut_file) or os.path.getsize(cut_file) == 0:
+            return 0
+        self.load_cuts(cut_file, None)
+        if not is_cut_store(cut_file):
+            # Checkpoints append to the file, so a legacy pickle is converted first
+            self.save_cuts(cut_file)
+        drop_partial_line(data_file)
+        print(f'Resuming from {len(self.cuts)} stored sets', flush=True)
+        return len(self.cuts[-1]) if self.cuts else 0
+
+    def load_cached_cuts(self, cache, n_cuts):
+        """
+        Get the first n_cuts sets from a SetCache if the cache holds that many sets of a grid equivalent to the board.
+        The cached sets are mapped back from the canonical grid. Return True on a cache hit
+        """
+        canonical, transform = canonical_form(self.board, *self.geometry)
+        cuts = cache.load(canonical, n_cuts)
+        if cuts is None:
+            return False
+        inverse = transform.inverse()
+        self.cuts = [inverse.map_cut(cut, self.n) for cut in cuts]
+        print(f'Loaded {len(self.cuts)} unavoidable sets from the cache', flush=True)
+        return True
+
+    def store_cached_cuts(self, cache):
+        """
+        Store the cuts in a SetCache under the canonical form of the board
+        """
+        canonical, transform = canonical_form(self.board, *self.geometry)
+        cache.store(canonical, [transform.map_cut(cut, self.n) for cut in self.cuts])
+
+    def write_cached_data(self, data_file):
+        """
+        Replace the data file by a single row recording that the cuts came from the cache, so it matches the cut file
+        """
+        open(data_file, "w").close()
+        append_csv_rows(data_file, [{"source": "cache", "sets": len(self.cuts)}])
 
     def fit(self, puzzle, solve=False):
         """
@@ -68,67 +151,108 @@ class ProblemInstance:
             sys.exit()
             return
         if (solve):
-            self.puzzle = []
-            for i in range(self.n):
-                for j in range(self.n):
-                    if puzzle[self.n*i+j] != ".":
-                        self.puzzle.append((i, j))
+            grid = parse_grids([puzzle], self.n)[0]
+            self.puzzle = [(int(i), int(j)) for i, j in zip(*np.nonzero(grid))]
             try:
-                puzzle = self.solve_puzzle(puzzle)
+                self.board = self.solve_puzzle(grid).astype(np.uint8)
             except ValueError:
                 print(f'Puzzle instance not solvable')
-                return
-        for i in range(self.n):
-            for j in range(self.n):
-                self.board[i][j] = self.hex_to_num(puzzle[self.n*i+j])
-
-    def solve_puzzle(self, puzzle):
-        """
-        If the puzzle instance is not yet solved, then this is a utility function to solve the puzzle using gurobi
-        """
-        model = gp.Model()
-        x = model.addVars(self.n, self.n, self.n, vtype=GRB.BINARY, name="X")
-        model.addConstrs((x.sum(i, j, "*") == 1
-                          for i in range(self.n)
-                          for j in range(self.n)),
-                         name="S")
-        model.addConstrs((x.sum(i, "*", k) == 1
-                          for i in range(self.n)
-                          for k in range(self.n)),
-                         name="C")
-        model.addConstrs((x.sum("*", j, k) == 1
-                          for j in range(self.n)
-                          for k in range(self.n)),
-                         name="R")
-        model.addConstrs((gp.quicksum(x[i, j, k]
-                                      for i in range(i0*self.sub_matrix_height, (i0+1)*self.sub_matrix_height)
-                                      for j in range(j0*self.sub_matrix_width, (j0+1)*self.sub_matrix_width)) <= 1
-                          for k in range(self.n) for i0 in range(self.board_height)
-                          for j0 in range(self.board_width)),
-                         name='SM')
-        for i in range(self.n):
-            for j in range(self.n):
-                k = self.n*i+j
-                if puzzle[k] != "0":
-                    x[i, j, int(puzzle[k])-1].LB = 1
-        model.setParam("OutputFlag", 0)
+            return
+        board = parse_grids([puzzle], self.n)[0]
+        if not board.all():
+            # An empty or invalid cell would map to the variable of another cell
+            raise ValueError(f'grid has an empty or invalid cell at {int(np.argmin(board.ravel()))}, solve it first')
+        self.board = board
+
+    def solve_puzzle(self, grid):
+        """
+        Solve a puzzle given as an (n, n) array with 0 for empty cells by propagation and backtracking with the bitmask
+        solver, gurobi is only used if the solver finds no solution. Raise ValueError if the puzzle is not solvable
+        """
+        solutions = self.solver.find_solutions(np.asarray(grid).ravel(), limit=1)
+        if solutions:
+            return np.array(solutions[0]).reshape(self.n, self.n)
+        return self.solve_puzzle_gurobi(grid)
+
+    def solve_puzzle_gurobi(self, grid):
+        """
+        Solve a puzzle given as an (n, n) array with 0 for empty cells with gurobi
+        """
+        model = sudoku_model(self.geometry, self.env)
+        x = model.getVars()
+        for cell, digit in enumerate(np.asarray(grid).ravel()):
+            if digit:
+                x[cell*self.n + int(digit)-1].LB = 1
         model.optimize()
         if (model.getAttr('Status') == 3):
             raise ValueError
-        xs = model.getAttr("X", x)
-        sol = ""
-        for i in range(self.n):
-            for j in range(self.n):
-                for k in range(self.n):
-                    if xs[i, j, k] > 0.5:
-                        sol += str(k+1)
-        return sol
+        xs = np.array(model.getAttr("X", x)).reshape(self.n*self.n, self.n)
+        return (np.argmax(xs, axis=1) + 1).reshape(self.n, self.n)
 
-    def create_problem_instance_files(self, save_directory=None, with_cuts=False, with_lower_bound=False, lower_bound=0):
+    def find_clue_heuristic(self, time_limit=10.0):
         """
-        Generate problem instance file after all cuts have been generated 
+        Find a uniquely solvable clue set with the hitting set heuristics over the cuts and store it as current solution,
+        raise hitting_set_lower_bound to the bound of the heuristics. Return the bounds record
         """
-        model = BilevelModel(self.instance_name)
+        clues, bounds = hitting_set_bounds(self.solver, self.board.astype(np.int64).ravel(),
+                                           cuts_to_bitsets(self.cuts, self.n), time_limit)
+        self.current_solution = [divmod(cell, self.n) for cell in clues]
+        self.hitting_set_lower_bound = max(self.hitting_set_lower_bound, bounds["lower_bound"])
+        bounds["lower_bound"] = self.hitting_set_lower_bound
+        return bounds
+
+    def write_start_files(self, save_directory, lower_bound=0, time_limit=10.0, automorphisms=()):
+        """
+        Run the hitting set heuristics and write the start solution of the bilevel model as <name>.mst and the bounds
+        as <name>.bounds.json. The start keeps the clues, the lower level solution is the board itself with M = 1. With
+        automorphisms the clues are replaced by their lex leader image, which satisfies the symmetry breaking rows
+        """
+        self.hitting_set_lower_bound = max(self.hitting_set_lower_bound, lower_bound)
+        bounds = self.find_clue_heuristic(time_limit)
+        if automorphisms:
+            self.current_solution = lex_leader(self.current_solution, automorphisms, self.n)
+        clues = set(self.current_solution)
+        with open(os.path.join(save_directory, f'{self.instance_name}.mst'), "w") as fp:
+            fp.write(f'# MIP start with {len(clues)} clues\n')
+            for i in range(self.n):
+                for j in range(self.n):
+                    given = int(self.board[i][j]) - 1
+                    fp.write("".join(f'X[{i},{j},{k}] {int(k == given)}\n' for k in range(self.n)))
+            fp.write("M 1\n")
+            for i in range(self.n):
+                for j in range(self.n):
+                    fp.write(f'Y[{i},{j}] {int((i, j) in clues)}\n')
+        with open(os.path.join(save_directory, f'{self.instance_name}.bounds.json'), "w") as fp:
+            json.dump(dict(instance=self.instance_name, **bounds), fp, indent=2)
+        print(f'Start solution with {bounds["upper_bound"]} clues, lower bound {bounds["lower_bound"]}', flush=True)
+
+    def create_problem_instance_files(self, save_directory=None, with_cuts=False, with_lower_bound=False, lower_bound=0,
+                                      writer="stream", compress=False, heuristic_time=10.0, symmetry=False):
+        """
+        Generate problem instance file after all cuts have been generated. The "stream" writer writes the files
+        directly from the index arrays, the "gurobi" writer builds the gurobi model and lets gurobi write it. Both
+        produce the same files. With compress the mps file is gzip compressed. With with_lower_bound the hitting set
+        heuristics run for up to heuristic_time seconds and write a start solution and a bounds file next to the mps
+        file, lower_bound is a known lower bound. With symmetry the upper level gets a symmetry breaking row
+        Y[c] >= Y[d] per automorphism of the board, c being the first cell it moves and d the image of c
+        """
+        automorphisms = []
+        if symmetry:
+            automorphisms = [a for a in grid_automorphisms(self.board, *self.geometry) if not a.is_identity()]
+            print(f'Found {len(automorphisms)} nontrivial automorphisms of the grid', flush=True)
+        pairs = symmetry_breaking_pairs(automorphisms)
+        if with_lower_bound:
+            self.write_start_files(save_directory, lower_bound, heuristic_time, automorphisms)
+        mps_file = os.path.join(save_directory, f'{self.instance_name}.mps' + (".gz" if compress else ""))
+        aux_file = os.path.join(save_directory, f'{self.instance_name}.aux')
+        if writer == "stream":
+            write_bilevel_instance(mps_file, aux_file, self.instance_name, self.geometry, self.given_variables(),
+                                   cuts_to_bitsets(self.cuts, self.n), pairs)
+            print(f'Generated Instances File for instance {self.instance_name}')
+            return
+        if writer != "gurobi":
+            raise ValueError(f'unknown writer {writer}')
+        model = BilevelModel(self.instance_name, env=self.env)
         # Define Variables
         x = model.add_lower_level_variables(
             self.n, self.n, self.n, vtype=GRB.BINARY, name="X")
@@ -136,72 +260,360 @@ class ProblemInstance:
         y = model.add_upper_level_variables(
             self.n, self.n, vtype=GRB.BINARY, name="Y")
         # Create lower level problem
-        model.add_lower_level_constraints((x.sum(i, j, "*") == 1
-                                           for i in range(self.n)
-                                           for j in range(self.n)),
-                                          name="S")
-        model.add_lower_level_constraints((x.sum(i, "*", k) == 1
-                                           for i in range(self.n)
-                                           for k in range(self.n)),
-                                          name="C")
-        model.add_lower_level_constraints((x.sum("*", j, k) == 1
-                                           for j in range(self.n)
-                                           for k in range(self.n)),
-                                          name="R")
-        model.add_lower_level_constraints((gp.quicksum(x[i, j, k]
-                                                       for i in range(i0*self.sub_matrix_height, (i0+1)*self.sub_matrix_height)
-                                                       for j in range(j0*self.sub_matrix_width, (j0+1)*self.sub_matrix_width)) == 1
-                                           for k in range(self.n) for i0 in range(self.board_height)
-                                           for j0 in range(self.board_width)),
-                                          name='SM')
-        model.add_lower_level_constraints((x[i, j, int(self.board[i][j]-1)] >= y[i, j]
-                                           for i in range(self.n)
-                                           for j in range(self.n)),
-                                          name="P")
-        model.add_lower_level_constraint((gp.quicksum(x[i, j, int(self.board[i][j]-1)]
-                                                      for i in range(self.n)
-                                                      for j in range(self.n)) - m <= self.n*self.n - 1),
+        x = list(x.values())
+        y = list(y.values())
+        given = self.given_variables()
+        for name, matrix, names in sudoku_constraint_blocks(*self.geometry):
+            model.add_lower_level_matrix_constraints(matrix, x, GRB.EQUAL, np.ones(matrix.shape[0]), names)
+        # P: a clue fixes the digit of its cell, X[i,j,k] - Y[i,j] >= 0 for the given digit k
+        cells = np.arange(self.n*self.n)
+        clue_matrix = sp.csr_matrix((np.concatenate([np.ones(len(cells)), -np.ones(len(cells))]),
+                                     (np.concatenate([cells, cells]), np.concatenate([given, self.n**3 + cells]))),
+                                    shape=(len(cells), self.n**3 + len(cells)))
+        model.add_lower_level_matrix_constraints(clue_matrix, x + y, GRB.GREATER_EQUAL, np.zeros(len(cells)),
+                                                 [f'P[{i},{j}]' for i in range(self.n) for j in range(self.n)])
+        model.add_lower_level_constraint(gp.LinExpr([1.0]*len(given), [x[g] for g in given]) - m <= self.n*self.n - 1,
                                          name="N")
         # Create upper level problem
         model.add_upper_level_constraint(m >= 1, name="B")
-        model.set_upper_level_objective(y.sum(), GRB.MINIMIZE)
+        model.set_upper_level_objective(gp.LinExpr([1.0]*len(y), y), GRB.MINIMIZE)
         model.set_lower_level_objective(m, GRB.MINIMIZE)
         # Add Cuts
-        for i, cut in enumerate(self.cuts):
-            model.add_upper_level_constraint(gp.quicksum(
-                y[i, j] for i, j in cut) >= 1, name=f'U{i}')
-        model.generate_model_files(os.path.join(save_directory, f'{self.instance_name}.mps'), os.path.join(
-            save_directory, f'{self.instance_name}.aux'))
+        if self.cuts:
+            rows = np.repeat(np.arange(len(self.cuts)), [len(cut) for cut in self.cuts])
+            columns = np.array([i*self.n + j for cut in self.cuts for i, j in cut])
+            cut_matrix = sp.csr_matrix((np.ones(len(columns)), (rows, columns)), shape=(len(self.cuts), len(y)))
+            model.add_upper_level_matrix_constraints(cut_matrix, y, GRB.GREATER_EQUAL, np.ones(len(self.cuts)),
+                                                     [f'U{i}' for i in range(len(self.cuts))])
+        if pairs:
+            pair_cells = np.array(pairs)
+            symmetry_matrix = sp.csr_matrix((np.tile([1.0, -1.0], len(pairs)),
+                                             (np.repeat(np.arange(len(pairs)), 2), pair_cells.ravel())),
+                                            shape=(len(pairs), len(y)))
+            model.add_upper_level_matrix_constraints(symmetry_matrix, y, GRB.GREATER_EQUAL, np.zeros(len(pairs)),
+                                                     [f'SB{i}' for i in range(len(pairs))])
+        model.generate_model_files(mps_file, aux_file)
         print(f'Generated Instances File for instance {self.instance_name}')
 
-    def generate_cuts(self, n_cuts, cut_file, data_file):
+    def write_checkpoint_instances(self, writer, checkpoints, save_directory, compress=False):
         """
-        Cut Generation Procedure
+        Write the instance files <name>_<k>.mps and .aux with the first k cuts for every checkpoint k that the cuts have
+        reached, writer is a BilevelInstanceWriter of the board. Return the checkpoints that are not reached yet
         """
-        start_time = time.time()  # Start time measurement
-        max_solve = 3*n_cuts
-        cut_model = gp.Model("SudokuCut")
-        cut_model.setParam("OutputFlag", 0)
+        for k in checkpoints:
+            if k <= len(self.cuts):
+                name = f'{self.instance_name}_{k}'
+                writer.write(os.path.join(save_directory, f'{name}.mps' + (".gz" if compress else "")),
+                             os.path.join(save_directory, f'{name}.aux'), name, cuts_to_bitsets(self.cuts[:k], self.n))
+                print(f'Generated Instances File for instance {name}', flush=True)
+        return [k for k in checkpoints if k > len(self.cuts)]
+
+    def given_variables(self):
+        """
+        Get the flat index of the variable X[i,j,k] of the given digit k of every cell (i, j)
         """
-        Add Variables
+        return self.geometry.given_variables(self.board)
+
+    def kept_cells_expression(self, x, cells):
+        """
+        Get the number of flat cells whose given digit is kept as a linear expression
+        """
+        given = self.given_variables()
+        cells = list(cells)
+        return gp.LinExpr([1.0]*len(cells), [x[given[c]] for c in cells])
+
+    def no_good_cut(self, x, cut):
+        """
+        Get the constraint that keeps at least one cell of an unavoidable set
+        """
+        return self.kept_cells_expression(x, (i*self.n + j for i, j in cut)) >= 1
+
+    def extract_cut(self, values):
+        """
+        Get the cells where a solution of the cut model differs from the board
+        """
+        changed = np.flatnonzero(np.asarray(values)[self.given_variables()] < 0.5)
+        return [divmod(int(cell), self.n) for cell in changed]
+
+    def build_cut_model(self, p, pool_size=1):
+        """
+        Build the model whose solutions are the sudoku grids differing from the board in exactly p cells. Return the
+        model, its list of variables (X[i,j,k] at flat index (i*n + j)*n + k) and the size constraint P
+        """
+        cut_model = sudoku_model(self.geometry, self.env)
+        if pool_size > 1:
+            cut_model.setParam("PoolSearchMode", 2)
+            cut_model.setParam("PoolSolutions", pool_size)
+        x = cut_model.getVars()
+        const = cut_model.addConstr(self.kept_cells_expression(x, range(self.n*self.n)) == self.n*self.n-p, name="P")
+        return cut_model, x, const
+
+    def find_pattern_cuts(self, pattern_size):
+        """
+        Get the unavoidable sets up to pattern_size that can be read off the board without an ILP
+        """
+        pattern_cuts = find_pattern_sets(self.board, self.sub_matrix_width, self.sub_matrix_height, pattern_size)
+        print(f'Found {len(pattern_cuts)} unavoidable sets from patterns', flush=True)
+        return pattern_cuts
+
+    def harvest_pool(self, cut_model, x, pool_size, store, telemetry=None):
+        """
+        Pass the cut of every solution in the pool of a solved cut model to store until store returns False. Return
+        True if the pool holds every solution of the current size, so the size needs no further solve
+        """
+        if telemetry is None:
+            telemetry = Telemetry()
+        for sol in range(min(cut_model.getAttr('SolCount'), pool_size)):
+            cut_model.setParam("SolutionNumber", sol)
+            with telemetry.phase("extract"):
+                cut = self.extract_cut(cut_model.getAttr('Xn', x))
+            if not store(cut):
+                break
+        return pool_size > 1 and cut_model.getAttr('SolCount') < pool_size
+
+    def cut_collector(self, cut_model, x, limit, first=0):
         """
-        x = cut_model.addVars(self.n, self.n, self.n,
-                              vtype=GRB.BINARY, name="X")
-        p = 4  # Initially search for cuts of size 4
+        Get the list of new cuts of a search and a store function for harvest_pool. store adds a cut not found before
+        to the list and its no good cut (numbered after first) to the model, it returns False once limit cuts are found
+        """
+        new_cuts = []
+        found = set()
+
+        def store(cut):
+            if frozenset(cut) not in found:
+                found.add(frozenset(cut))
+                new_cuts.append(cut)
+                cut_model.addConstr(self.no_good_cut(x, cut), name=f'C{first+len(new_cuts)}')
+            return len(new_cuts) < limit
+
+        return new_cuts, store
+
+    def start_generation(self, n_cuts, cut_file, data_file, pool_size=1, pattern_size=0, block_size=0, resume=False,
+                         workers=1, telemetry=None):
+        """
+        Set up a cut generation run. Collect the pattern sets up to pattern_size and the block sets up to block_size,
+        then reload the cuts of an interrupted run (resume) or start empty cut and data files. Return the size the ILP
+        starts at, the pattern and block sets that are not stored yet (distinct and sorted by size) and the data rows
+        of the block solves
+        """
+        if telemetry is None:
+            telemetry = Telemetry()
+        p = 4
+        pending = []
+        if pattern_size >= 4:
+            # Sizes fully covered by the patterns need no ILP, larger pattern sets wait until the ILP reaches their size
+            pending = self.find_pattern_cuts(pattern_size)
+            p = min(pattern_size, PATTERN_COMPLETE_SIZE) + 1
+        block_data = []
+        if block_size >= 4:
+            with telemetry.phase("blocks"):
+                block_cuts, block_data = self.find_block_cuts(block_size, n_cuts, pool_size, workers)
+            pending = sorted(pending + block_cuts, key=len)
         self.cuts = []
+        resumed = self.resume_cuts(cut_file, data_file) if resume else 0
+        if resumed:
+            # The last stored size may have been cut short by the set limit, so it is searched again
+            p = max(p, resumed)
+        else:
+            self.save_cuts(cut_file)
+            open(data_file, "w").close()
+        # A set found both as pattern and as block set, or stored already, would count as dominated
+        found = set(frozenset(cut) for cut in self.cuts)
+        distinct = []
+        for cut in pending:
+            if frozenset(cut) not in found:
+                found.add(frozenset(cut))
+                distinct.append(cut)
+        return p, distinct, block_data
+
+    def start_checkpoint_instances(self, checkpoints, save_directory, compress=False):
+        """
+        Get a BilevelInstanceWriter of the board for write_checkpoint_instances (None without checkpoints), write the
+        instance files of the checkpoints that the stored cuts reach and return the writer and the other checkpoints
+        """
+        if not checkpoints:
+            return None, []
+        writer = BilevelInstanceWriter(self.geometry, self.given_variables())
+        return writer, self.write_checkpoint_instances(writer, sorted(checkpoints), save_directory, compress)
+
+    def enumerate_region_cuts(self, p, region, cuts, limit, pool_size=1, threads=1):
+        """
+        Find up to limit unavoidable sets of size p that avoid every cut in cuts and whose first cell lies in row
+        region, that is all rows above region are kept and at least one cell of row region changes
+        """
+        cut_model, x, const = self.build_cut_model(p, pool_size)
+        cut_model.setParam("Threads", threads)
+        given = self.given_variables()
+        for cell in range(region*self.n):
+            x[given[cell]].LB = 1
+        cut_model.addConstr(self.kept_cells_expression(x, range(region*self.n, (region+1)*self.n)) <= self.n-1,
+                            name="F")
+        for c, cut in enumerate(cuts):
+            cut_model.addConstr(self.no_good_cut(x, cut), name=f'C{c+1}')
+        new_cuts, store = self.cut_collector(cut_model, x, limit, len(cuts))
+        data = []
+        while len(new_cuts) < limit:
+            cut_model.optimize()
+            merged = dict()
+            merged.update(get_gurobi_model_stats(cut_model))
+            merged.update({"cut_size": p, "region": region, "pruned_sets": 0})
+            data.append(merged)
+            if (cut_model.getAttr('Status') == 3):
+                break
+            if self.harvest_pool(cut_model, x, pool_size, store):
+                break
+        return new_cuts, data
+
+    def block_regions(self):
+        """
+        Get the subproblems of the decomposition as (label, flat cells) pairs, every pair of bands and every pair of
+        stacks. On boards with only two bands (stacks) every single band (stack) is used instead
+        """
+        rows = self.geometry.cell_row // self.sub_matrix_height
+        cols = self.geometry.cell_col // self.sub_matrix_width
+        regions = []
+        for name, groups, count in (("bands", rows, self.board_height), ("stacks", cols, self.board_width)):
+            for chosen in itertools.combinations(range(count), 2 if count > 2 else 1):
+                label = f'{name} {",".join(str(c) for c in chosen)}'
+                regions.append((label, np.flatnonzero(np.isin(groups, chosen))))
+        return regions
+
+    def enumerate_block_cuts(self, label, cells, max_size, limit, pool_size=1, threads=None):
+        """
+        Find up to limit unavoidable sets of size 4 to max_size that lie within the flat cells, every other cell keeps
+        its digit. The fixed variables are removed by presolve, so every solve only covers the cells of the block
+        """
+        cut_model, x, const = self.build_cut_model(4, pool_size)
+        if threads is not None:
+            cut_model.setParam("Threads", threads)
+        given = self.given_variables()
+        for cell in np.setdiff1d(np.arange(self.n*self.n), cells).tolist():
+            x[given[cell]].LB = 1
+        new_cuts, store = self.cut_collector(cut_model, x, limit)
+        data = []
+        p = 4
+        while len(new_cuts) < limit and p <= max_size:
+            cut_model.optimize()
+            merged = dict()
+            merged.update(get_gurobi_model_stats(cut_model))
+            merged.update({"cut_size": p, "region": label})
+            data.append(merged)
+            exhausted = cut_model.getAttr('Status') == 3
+            if not exhausted:
+                exhausted = self.harvest_pool(cut_model, x, pool_size, store)
+            if exhausted:
+                p += 1
+                const.RHS = self.n*self.n-p
+        return new_cuts, data
+
+    def find_block_cuts(self, max_size, limit, pool_size=1, workers=1):
         """
-        Start building the model
+        Enumerate the unavoidable sets up to max_size within every subproblem of block_regions, on a pool of worker
+        processes if workers is larger than one. Return the distinct sets sorted by size and the data rows of the solves
         """
-        cut_model.addConstrs((x.sum(i, j, '*') == 1 for i in range(self.n)
-                             for j in range(self.n)), name='S')
-        cut_model.addConstrs((x.sum(i, '*', k) == 1 for i in range(self.n)
-                             for k in range(self.n)), name='C')
-        cut_model.addConstrs((x.sum('*', j, k) == 1 for j in range(self.n)
-                             for k in range(self.n)), name='R')
-        cut_model.addConstrs((gp.quicksum(x[i, j, k] for i in range(i0*self.sub_matrix_height, (i0+1)*self.sub_matrix_height) for j in range(
-            j0*self.sub_matrix_width, (j0+1)*self.sub_matrix_width)) <= 1 for k in range(self.n) for i0 in range(self.board_height) for j0 in range(self.board_width)), name='SM')
-        const = cut_model.addConstr(gp.quicksum(x[i, j, int(
-            self.board[i][j]-1)] for i in range(self.n) for j in range(self.n)) == self.n*self.n-p, name="P")
+        regions = self.block_regions()
+        if workers > 1:
+            board = self.board.tolist()
+            tasks = [(self.geometry, board, label, cells, max_size, limit, pool_size) for label, cells in regions]
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(_enumerate_block_cuts, tasks, chunksize=1)
+        else:
+            results = [self.enumerate_block_cuts(label, cells, max_size, limit, pool_size) for label, cells in regions]
+        block_cuts = {}
+        data = []
+        for region_cuts, region_data in results:
+            for cut in region_cuts:
+                block_cuts.setdefault(frozenset(cut), sorted(cut))
+            data.extend(region_data)
+        block_cuts = sorted(block_cuts.values(), key=lambda cut: (len(cut), cut))
+        print(f'Found {len(block_cuts)} unavoidable sets in {len(regions)} band and stack subproblems', flush=True)
+        return block_cuts, data
+
+    def generate_cuts_parallel(self, n_cuts, cut_file, data_file, workers, pool_size=1, pattern_size=0, resume=False,
+                               mps_checkpoints=(), mps_directory=None, compress=False, block_size=0):
+        """
+        Cut Generation Procedure on a pool of worker processes. The sets are generated in rounds of increasing size p.
+        In every round each row of the board is a separate task searching the sets whose first cell lies in that row,
+        so the tasks are disjoint and each one runs its own model. The results of a round are merged in sorted order,
+        which makes the output independent of the scheduling of the tasks. Every round is appended to the cut and data
+        file, with resume a run continues from the sets stored in the cut file. The instance files of the mps_checkpoints
+        are written to mps_directory as soon as the inserted pattern and block sets or a round reach them and the
+        block_size decomposition runs on the same number of workers, as in generate_cuts
+        """
+        p, pending, data = self.start_generation(n_cuts, cut_file, data_file, pool_size, pattern_size, block_size, resume,
+                                                 workers)
+        for row in data:
+            row.update({"pruned_sets": 0})
+        index = SubsetIndex()
+        for cut in self.cuts:
+            index.add(cut)
+        pruned = 0
+        board = self.board.tolist()
+        saved = len(self.cuts)
+        writer, mps_checkpoints = self.start_checkpoint_instances(mps_checkpoints, mps_directory, compress)
+        with multiprocessing.Pool(workers) as pool:
+            while len(self.cuts) < n_cuts and p <= self.n**2:
+                while pending and len(pending[0]) <= p and len(self.cuts) < n_cuts:
+                    cut = pending.pop(0)
+                    if index.add_if_minimal(cut):
+                        self.cuts.append(cut)
+                    else:
+                        pruned += 1
+                if mps_checkpoints:
+                    # The inserted sets alone may reach a checkpoint
+                    mps_checkpoints = self.write_checkpoint_instances(writer, mps_checkpoints, mps_directory, compress)
+                limit = n_cuts - len(self.cuts)
+                if limit <= 0:
+                    break
+                # The rows of the previous round are only written now, the dominated sets dropped above are counted in
+                # its last row if no round follows
+                append_csv_rows(data_file, data)
+                data = []
+                tasks = [(self.geometry, board, p, region, self.cuts, limit, pool_size) for region in range(self.n)]
+                results = pool.map(_enumerate_region_cuts, tasks, chunksize=1)
+                round_cuts = []
+                for region_cuts, region_data in results:
+                    round_cuts.extend(region_cuts)
+                    data.extend(region_data)
+                # Dominated pattern sets dropped before this round are counted in its first row
+                data[len(data)-sum(len(region_data) for _, region_data in results)]["pruned_sets"] = pruned
+                pruned = 0
+                round_cuts.sort()
+                for cut in round_cuts[:limit]:
+                    # Sets of one round have the same size and avoid all earlier sets, so none of them is dominated
+                    index.add(cut)
+                    self.cuts.append(cut)
+                print(f'current set count: {len(self.cuts)} (size {p} done)', flush=True)
+                self.append_cuts(cut_file, saved)
+                saved = len(self.cuts)
+                if mps_checkpoints:
+                    mps_checkpoints = self.write_checkpoint_instances(writer, mps_checkpoints, mps_directory, compress)
+                p += 1
+        if pruned and data:
+            data[-1]["pruned_sets"] += pruned
+        elif pruned:
+            print(f'{pruned} dominated sets dropped before the first solve', flush=True)
+        append_csv_rows(data_file, data)
+        self.append_cuts(cut_file, saved)
+        for k in mps_checkpoints:
+            print(f'Only {len(self.cuts)} sets found, no instance file with {k} sets', flush=True)
+
+    def generate_cuts(self, n_cuts, cut_file, data_file, pool_size=1, pattern_size=0, symmetry=False,
+                      checkpoint_every=1000, resume=False, telemetry=None, mps_checkpoints=(), mps_directory=None,
+                      compress=False, block_size=0, workers=1):
+        """
+        Cut Generation Procedure. Solve the cut model for unavoidable sets of increasing size until n_cuts sets are
+        stored, with one row per solve in the data file. The options are described in the README, the setup is shared
+        with generate_cuts_parallel (start_generation and start_checkpoint_instances) and every solve is harvested by
+        harvest_pool. telemetry is a Telemetry from logging_helper
+        """
+        if telemetry is None:
+            telemetry = Telemetry()
+        telemetry.start()
+        max_solve = 3*n_cuts
+        p, pending, block_data = self.start_generation(n_cuts, cut_file, data_file, pool_size, pattern_size,
+                                                       block_size, resume, workers, telemetry)
+        cut_model, x, const = self.build_cut_model(p, pool_size)
         """
         Initiate Variables 
         """
@@ -209,7 +621,85 @@ class ProblemInstance:
         cnt = 0
         fail = 0
         data = []
+        for row in block_data:
+            # Same columns in the same order as the rows of the whole board solves
+            region = row.pop("region")
+            row.update({"pruned_sets": 0})
+            if symmetry:
+                row.update({"orbit_sets": 0})
+            row.update({"region": region})
+            data.append(row)
+        found = set()
+        index = SubsetIndex()
+        pruned = 0  # Dominated sets dropped before the first solve
+        orbits = 0  # Orbit images stored before the first solve
+        for k, cut in enumerate(self.cuts):
+            found.add(frozenset(cut))
+            index.add(cut)
+            cut_model.addConstr(self.no_good_cut(x, cut), name=f'C{k+1}')
+
+        saved = len(self.cuts)
+        writer, mps_checkpoints = self.start_checkpoint_instances(mps_checkpoints, mps_directory, compress)
+        written = 0  # Data rows already appended to the data file
+        orbit_count = 0
+        automorphisms = []
+        if symmetry:
+            automorphisms = grid_automorphisms(self.board, self.sub_matrix_width, self.sub_matrix_height,
+                                               self.board_width, self.board_height)
+            print(f'Found {len(automorphisms)} automorphisms of the grid', flush=True)
+
+        def checkpoint(final=False):
+            """
+            Append the new cuts and the finished data rows to the files. The last data row is still counting the sets
+            of the current solve, so it is only written with final
+            """
+            nonlocal saved, written
+            end = len(data) if final else max(len(data) - 1, written)
+            append_csv_rows(data_file, data[written:end])
+            written = end
+            self.append_cuts(cut_file, saved)
+            saved = len(self.cuts)
+
+        def store(cut):
+            """
+            Store a new cut and its images under the automorphisms unless they contain a stored cut, add their no good
+            cuts and checkpoint the progress. Return False once n_cuts cuts are stored
+            """
+            nonlocal orbit_count, pruned, orbits, mps_checkpoints
+            for image in [cut] + cut_orbit(cut, automorphisms, self.n):
+                if frozenset(image) in found or len(self.cuts) >= n_cuts:
+                    continue
+                if not index.add_if_minimal(image):
+                    if data:
+                        data[-1]["pruned_sets"] += 1
+                    else:
+                        pruned += 1
+                    continue
+                if image is not cut:
+                    orbit_count += 1
+                    if data:
+                        data[-1]["orbit_sets"] += 1
+                    else:
+                        orbits += 1
+                found.add(frozenset(image))
+                self.cuts.append(image)
+                with telemetry.phase("no_good"):
+                    cut_model.addConstr(self.no_good_cut(x, image), name=f'C{len(self.cuts)}')
+                if (len(self.cuts) % 50 == 0):
+                    print(f'current set count: {len(self.cuts)}', flush=True)
+                if len(self.cuts) - saved >= checkpoint_every:
+                    with telemetry.phase("checkpoint"):
+                        checkpoint()
+                if mps_checkpoints and len(self.cuts) == mps_checkpoints[0]:
+                    with telemetry.phase("mps"):
+                        mps_checkpoints = self.write_checkpoint_instances(writer, mps_checkpoints, mps_directory,
+                                                                          compress)
+            return len(self.cuts) < n_cuts
+
         for iter in range(max_solve):
+            while pending and len(pending[0]) <= p and len(self.cuts) < n_cuts:
+                # Insert pattern sets before the ILP searches their size
+                store(pending.pop(0))
             if len(self.cuts) >= n_cuts:
                 # If enough cut generated then stop
                 break
@@ -217,13 +707,20 @@ class ProblemInstance:
                 # If p is over n**2 then all cut have been generated
                 break
             # Do the optimization
-            cut_model.optimize()
+            with telemetry.phase("optimize"):
+                cut_model.optimize()
             # Add time to measured time
             optimization_runtime += cut_model.getAttr("Runtime")
             # Store Data
             merged = dict()
             merged.update(get_gurobi_model_stats(cut_model))
-            merged.update({"cut_size": p})
+            merged.update({"cut_size": p, "pruned_sets": pruned})
+            pruned = 0
+            if symmetry:
+                merged.update({"orbit_sets": orbits})
+                orbits = 0
+            if block_size >= 4:
+                merged.update({"region": "board"})
             data.append(merged)
             # Add iteration count
             cnt += 1
@@ -231,32 +728,94 @@ class ProblemInstance:
             if (status == 3):
                 # ILP Infreasible
                 fail += 1
-                cut_model.remove(const)  # Remove p constraint
                 p += 1
-                const = cut_model.addConstr(gp.quicksum(x[i, j, int(self.board[i][j]-1)] for i in range(
-                    self.n) for j in range(self.n)) == self.n*self.n-p, name="P")  # Add new p constant
+                with telemetry.phase("modify"):
+                    const.RHS = self.n*self.n-p  # Move the p constraint to the next size
+                telemetry.record(cut_size=merged["cut_size"], status=status, gurobi_runtime=merged["runtime"], sets=len(self.cuts))
                 continue
-            # ILP Feasible, get cut
-            cut = []
-            xs = cut_model.getAttr('X', x)
-            for i in range(self.n):
-                for j in range(self.n):
-                    if (xs[i, j, int(self.board[i][j]-1)] < 0.5):
-                        cut.append((i, j))
+            # ILP Feasible, get a cut from every solution in the pool. Two pool solutions may differ from the board on the
+            # same cells, store skips the repeated cut
+            if self.harvest_pool(cut_model, x, pool_size, store, telemetry):
+                # The pool holds every solution of size p so there is no need to prove infeasibility with another solve
+                p += 1
+                with telemetry.phase("modify"):
+                    const.RHS = self.n*self.n-p
+            telemetry.record(cut_size=merged["cut_size"], status=status, gurobi_runtime=merged["runtime"],
+                             sets=len(self.cuts))
+        total_runtime = telemetry.stop()
+        print(f'Total runtime {total_runtime:.2f} s, of which {optimization_runtime:.2f} s in gurobi', flush=True)
+        if symmetry:
+            print(f'{orbit_count} of {len(self.cuts)} sets came from orbits', flush=True)
+        if (pruned or orbits) and not data:
+            print(f'{pruned} dominated sets dropped and {orbits} orbit sets stored without a solve', flush=True)
+        checkpoint(final=True)
+        for k in mps_checkpoints:
+            print(f'Only {len(self.cuts)} sets found, no instance file with {k} sets', flush=True)
+
+    def solve_minimum_clues(self, time_limit=None, threads=None):
+        """
+        Solve the minimum clue problem of the board directly. The master problem is the hitting set problem over the
+        cuts, choose the fewest clues Y such that every unavoidable set keeps at least one clue. Every incumbent is
+        checked with the bitmask solver, if its clues allow another solution the cells where that solution differs
+        from the board form a new unavoidable set which is added to the cuts and as a lazy constraint. A known puzzle
+        given to fit is used as start solution. Return a row in the format of computational_result/9by9.csv
+        """
+        model = gp.Model(self.instance_name, env=self.env)
+        model.setParam("OutputFlag", 0)
+        model.setParam("LazyConstraints", 1)
+        if time_limit is not None:
+            model.setParam("TimeLimit", time_limit)
+        if threads is not None:
+            model.setParam("Threads", threads)
+        y = model.addMVar(self.n*self.n, vtype=GRB.BINARY, name="Y").tolist()
+        model.setObjective(gp.LinExpr([1.0]*len(y), y), GRB.MINIMIZE)
+        for c, cut in enumerate(self.cuts):
+            model.addConstr(gp.quicksum(y[i*self.n + j] for i, j in cut) >= 1, name=f'U{c}')
+        for i, j in self.puzzle:
+            y[i*self.n + j].Start = 1
+        board = self.board.astype(int).ravel()
+        initial_cuts = len(self.cuts)
+
+        def separate(model, where):
+            """
+            Reject an incumbent whose clues do not determine the board by the unavoidable set it misses
+            """
+            if where != GRB.Callback.MIPSOL:
+                return
+            clues = np.asarray(model.cbGetSolution(y)) > 0.5
+            solutions = self.solver.find_solutions(np.where(clues, board, 0), limit=2)
+            if len(solutions) == 1:
+                return
+            other = next(np.array(s) for s in solutions if s != board.tolist())
+            cut = [divmod(int(cell), self.n) for cell in np.flatnonzero(other != board)]
             self.cuts.append(cut)
-            # Add no good cut
-            cut_model.addConstr(gp.quicksum(
-                x[i, j, int(self.board[i][j]-1)] for i, j in cut) >= 1, name=f'C{len(self.cuts)}')
-            if (len(self.cuts) % 50 == 0):
-                print(f'current set count: {len(self.cuts)}', flush=True)
-            if (len(self.cuts) % 1000 == 0 and len(self.cuts)>= 999):
-                self.save_cuts(cut_file)
-                cut_data = pd.DataFrame(data)
-                cut_data.to_csv(data_file, index=False) 
-        total_runtime = time.time()-start_time
-        cut_data = pd.DataFrame(data)
-        cut_data.to_csv(data_file, index=False)
-        self.save_cuts(cut_file)
+            model.cbLazy(gp.quicksum(y[i*self.n + j] for i, j in cut) >= 1)
+
+        start_time = time.time()
+        model.optimize(separate)
+        runtime = time.time() - start_time
+        self.hitting_set_lower_bound = model.getAttr("ObjBound")
+        print(f'Added {len(self.cuts) - initial_cuts} lazy unavoidable sets', flush=True)
+        status = model.getAttr("Status")
+        solved = model.getAttr("SolCount") > 0
+        if solved:
+            self.current_solution = [divmod(cell, self.n) for cell in range(self.n*self.n) if y[cell].X > 0.5]
+        return {
+            "instance": self.instance_name,
+            "parameter": "lazy",
+            "cut_count": initial_cuts,
+            "known_puzzle": len(self.puzzle),
+            "best_solution": model.getAttr("ObjVal") if solved else None,
+            "lower bound": self.hitting_set_lower_bound,
+            "gap": 100*model.getAttr("MIPGap") if solved else None,
+            "runtime": runtime,
+            "node_count": int(model.getAttr("NodeCount")),
+            "remaining_nodes": int(model.getAttr("OpenNodeCount")),
+            "status": {GRB.OPTIMAL: "Optimal", GRB.TIME_LIMIT: "Time Limit"}.get(status, str(status)),
+            "cpu_type": platform.processor(),
+            "time_limit": time_limit,
+            "ram": None,
+        }
 
     def check_current_solution(self):
         if (self.check_solution_feasibility(self.current_solution)):
@@ -268,91 +827,57 @@ class ProblemInstance:
         """
         Check if the generated sudoku grid have a unique solution 
         """
-        another_solution = gp.Model("AnotherSolution")
-        x = another_solution.addVars(
-            self.n, self.n, self.n, vtype=GRB.BINARY, name="X")
-        another_solution.addConstrs((x.sum(i, j, '*') == 1
-                                    for i in range(self.n)
-                                    for j in range(self.n)),
-                                    name='S')
-        another_solution.addConstrs((x.sum(i, '*', k) == 1
-                                    for i in range(self.n)
-                                    for k in range(self.n)),
-                                    name='C')
-        another_solution.addConstrs((x.sum('*', j, k) == 1
-                                    for j in range(self.n)
-                                    for k in range(self.n)),
-                                    name='R')
-        another_solution.addConstrs((gp.quicksum(x[i, j, k]
-                                    for i in range(i0*self.sub_matrix_height, (i0+1)*self.sub_matrix_height)
-                                    for j in range(j0*self.sub_matrix_width, (j0+1)*self.sub_matrix_width)) <= 1
-                                    for k in range(self.n)
-                                    for i0 in range(self.board_height)
-                                    for j0 in range(self.board_width)),
-                                    name='SM')
+        grid = np.zeros(shape=(self.n, self.n), dtype=int)
         for i, j in solution:
-            x[i, j, int(self.board[i][j]-1)].LB = 1
-        another_solution.addConstr(gp.quicksum(x[i, j, int(self.board[i][j]-1)]
-                                               for i in range(self.n)
-                                               for j in range(self.n)) <= self.n*self.n-1,
-                                   name="NG")
-        another_solution.setParam("OutputFlag", 0)
-        another_solution.optimize()
-        if (another_solution.getAttr('Status') == 3):
+            grid[i][j] = self.board[i][j]
+        solutions = self.solver.find_solutions(grid.ravel(), limit=2)
+        if (len(solutions) == 1):
             return True
         else:
             print("Found Another Solution:")
-            a_solution = another_solution.getAttr("X", x)
+            board = self.board.astype(int).ravel().tolist()
+            a_solution = next(s for s in solutions if s != board)
             for i in range(self.n):
                 sol = ''
                 for j in range(self.n):
-                    for k in range(self.n):
-                        if (a_solution[i, j, k] >= 0.5):
-                            sol += str(k+1) + ' '
+                    sol += str(a_solution[self.n*i+j]) + ' '
                 print(sol)
             return False
 
-    def check_cuts(self):
+    def check_cuts(self, sample_size=None):
         """
-        Check randomly 100 unavoidable sets if they are correct, that is removing the set from the board  yields a non unique sudoku 
+        Check if the unavoidable sets are correct, that is removing the set from the board yields a non unique sudoku.
+        All sets are checked unless sample_size is given, in which case that many sets are checked at random
         """
-        cuts = random.choices(self.cuts, k=min(100, len(self.cuts)))
+        cuts = self.cuts
+        if sample_size is not None:
+            cuts = random.choices(self.cuts, k=min(sample_size, len(self.cuts)))
         for cut in cuts:
-            another_solution = gp.Model("AnotherSolution")
-            x = another_solution.addVars(
-                self.n, self.n, self.n, vtype=GRB.BINARY, name="X")
-            another_solution.addConstrs((x.sum(i, j, '*') == 1
-                                         for i in range(self.n)
-                                         for j in range(self.n)),
-                                        name='S')
-            another_solution.addConstrs((x.sum(i, '*', k) == 1
-                                         for i in range(self.n)
-                                         for k in range(self.n)),
-                                        name='C')
-            another_solution.addConstrs((x.sum('*', j, k) == 1
-                                         for j in range(self.n)
-                                         for k in range(self.n)),
-                                        name='R')
-            another_solution.addConstrs((gp.quicksum(x[i, j, k]
-                                                     for i in range(i0 * self.sub_matrix_height,
-                                                                    (i0 + 1) * self.sub_matrix_height)
-                                                     for j in range(j0 * self.sub_matrix_width,
-                                                                    (j0 + 1) * self.sub_matrix_width)) <= 1
-                                         for k in range(self.n)
-                                         for i0 in range(self.board_height)
-                                         for j0 in range(self.board_width)),
-                                        name='SM')
-            for i in range(self.n):
-                for j in range(self.n):
-                    if (i, j) not in cut:
-                        x[i, j, int(self.board[i][j] - 1)].LB = 1
-            another_solution.addConstr(gp.quicksum(x[i, j, int(self.board[i][j] - 1)]
-                                                   for i in range(self.n)
-                                                   for j in range(self.n)) <= self.n * self.n - 1,
-                                       name="NG")
-            another_solution.setParam("OutputFlag", 0)
-            another_solution.optimize()
-            if (another_solution.getAttr('Status') == 3):
+            grid = self.board.astype(int)
+            for i, j in cut:
+                grid[i][j] = 0
+            if (self.solver.count_solutions(grid.ravel(), limit=2) < 2):
                 print("Bad Cut")
                 return False
         print("Cut Check Passed")
+        return True
+
+
+def _enumerate_region_cuts(task):
+    """
+    Worker entry point of generate_cuts_parallel, rebuild the instance from its board and search one region
+    """
+    geometry, board, p, region, cuts, limit, pool_size = task
+    instance = ProblemInstance("worker", *geometry)
+    instance.board = np.array(board, dtype=np.uint8)
+    return instance.enumerate_region_cuts(p, region, cuts, limit, pool_size)
+
+
+def _enumerate_block_cuts(task):
+    """
+    Worker entry point of find_block_cuts, rebuild the instance from its board and search one subproblem
+    """
+    geometry, board, label, cells, max_size, limit, pool_size = task
+    instance = ProblemInstance("worker", *geometry)
+    instance.board = np.array(board, dtype=np.uint8)
+    return instance.enumerate_block_cuts(label, cells, max_size, limit, pool_size, threads=1)
@@ -1,8 +1,18 @@
 """
 logging_helper.py
 
-A utility function to help us get gurobi model stats
+A utility function to help us get gurobi model stats, append rows to csv files and instrument the cut generation loop
 """
+import contextlib
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+
 def get_gurobi_model_stats(model):
     return {
         "num_vars": model.getAttr('numVars'),
@@ -14,4 +24,112 @@ def get_gurobi_model_stats(model):
         "open_node_count": model.getAttr('OpenNodeCount'),
         "bar_iter_count": model.getAttr('BarIterCount'),
         "status": model.getAttr('Status')
-    }
\ No newline at end of file
+    }
+
+
+def append_csv_rows(data_file, rows):
+    """
+    Append rows (a list of dicts) to a csv file and sync it to disk. The header is only written into an empty file
+    """
+    if not rows:
+        return
+    with open(data_file, "a") as fp:
+        pd.DataFrame(rows).to_csv(fp, header=fp.tell() == 0, index=False)
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def drop_partial_line(data_file):
+    """
+    Cut a csv file back to its last complete line, dropping a line that was only partially written when the process
+    was killed
+    """
+    if not os.path.exists(data_file):
+        return
+    with open(data_file, "r+b") as fp:
+        content = fp.read()
+        fp.truncate(content.rfind(b"\n") + 1)
+
+
+class Telemetry:
+    """
+    Per iteration instrumentation of the cut generation loop. The time spent in each phase of an iteration is summed
+    with phase, record closes the iteration, writes it as one json line to the telemetry file (if given) and passes it
+    to every hook. With profile the loop runs under cProfile and the stats are written to <profile>.prof, with
+    trace_memory the peak memory traced by tracemalloc is added to every record
+    """
+
+    def __init__(self, telemetry_file=None, hooks=None, profile=None, trace_memory=False):
+        self.telemetry_file = telemetry_file
+        self.hooks = list(hooks or [])
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.iteration = 0
+        self.profiler = None
+        self.fp = None
+        self.start_time = time.perf_counter()
+
+    def add_hook(self, hook):
+        """
+        Call hook with every record
+        """
+        self.hooks.append(hook)
+
+    def start(self):
+        """
+        Open the telemetry file and start the profilers
+        """
+        if self.telemetry_file is not None:
+            self.fp = open(self.telemetry_file, "a")
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        """
+        Stop the profilers and close the telemetry file, return the wall clock time since start
+        """
+        total = time.perf_counter() - self.start_time
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(f'{self.profile}.prof')
+            self.profiler = None
+        if self.trace_memory:
+            tracemalloc.stop()
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+        return total
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Add the time spent in the block to the phase name of the current iteration, phases should not be nested
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def record(self, **fields):
+        """
+        Close the current iteration with the given fields and the phase times
+        """
+        record = {"iteration": self.iteration, "wall_time": time.perf_counter() - self.start_time}
+        record.update(fields)
+        record.update({f'{name}_time': value for name, value in self.phases.items()})
+        if self.trace_memory:
+            record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        self.phases = {}
+        self.iteration += 1
+        if self.fp is not None:
+            self.fp.write(json.dumps(record) + "\n")
+            self.fp.flush()
+        for hook in self.hooks:
+            hook(record)
+        return record
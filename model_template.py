@@ -0,0 +1,75 @@
+"""
+model_template.py
+
+Shared construction of the sudoku constraints. The constraint matrices of a board geometry are built once from index
+arrays and added with the gurobi matrix API. Models that only need the plain sudoku constraints are copied from a
+cached template instead of being rebuilt from python expressions.
+
+The variable X[i,j,k] (cell (i, j) holds digit k+1) has the flat index (i*n + j)*n + k.
+"""
+import functools
+
+import gurobipy as gp
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+from geometry import board_geometry
+
+_templates = {}
+
+
+@functools.lru_cache(maxsize=None)
+def sudoku_constraint_blocks(sub_matrix_width, sub_matrix_height, board_width, board_height):
+    """
+    Get the constraint blocks S (one digit per cell), C (digit once per row), R (digit once per column) and SM (digit
+    once per sub matrix) as a list of (name, matrix, constraint names)
+    """
+    geometry = board_geometry(sub_matrix_width, sub_matrix_height, board_width, board_height)
+    n = geometry.n
+    # Column (cell*n + k) of X belongs to cell "cell" and digit k
+    cell, k = np.divmod(np.arange(n**3), n)
+    i, j = geometry.cell_row[cell], geometry.cell_col[cell]
+    columns = np.arange(n**3)
+    box_rows = k*board_height*board_width + geometry.cell_box[cell]
+    blocks = []
+    for name, rows, keys in (("S", i*n + j, [(a, b) for a in range(n) for b in range(n)]),
+                             ("C", i*n + k, [(a, b) for a in range(n) for b in range(n)]),
+                             ("R", j*n + k, [(a, b) for a in range(n) for b in range(n)]),
+                             ("SM", box_rows, [(a, b, c) for a in range(n)
+                                               for b in range(board_height) for c in range(board_width)])):
+        matrix = sp.csr_matrix((np.ones(n**3), (rows, columns)), shape=(len(keys), n**3))
+        names = [f'{name}[{",".join(str(v) for v in key)}]' for key in keys]
+        blocks.append((name, matrix, names))
+    return blocks
+
+
+def add_sudoku_constraints(model, variables, geometry, box_sense=GRB.LESS_EQUAL):
+    """
+    Add the S, C, R and SM constraints over the n**3 variables to a model, return the list of added constraints
+    """
+    constrs = []
+    for name, matrix, names in sudoku_constraint_blocks(*geometry):
+        sense = box_sense if name == "SM" else GRB.EQUAL
+        block = model.addMConstr(matrix, variables, sense, np.ones(matrix.shape[0]))
+        model.update()
+        model.setAttr("ConstrName", block.tolist(), names)
+        constrs.extend(block.tolist())
+    return constrs
+
+
+def sudoku_model(geometry, env=None):
+    """
+    Get a fresh copy of the model with the binary variables X and the sudoku constraints of a geometry. The template
+    is built once per geometry and environment
+    """
+    key = (geometry, id(env))
+    if key not in _templates:
+        n = geometry[0] * geometry[2]
+        template = gp.Model("Sudoku", env=env)
+        template.setParam("OutputFlag", 0)
+        x = template.addMVar((n, n, n), vtype=GRB.BINARY, name="X")
+        add_sudoku_constraints(template, x.reshape(-1), geometry)
+        template.update()
+        # Keep the environment alive as long as its template
+        _templates[key] = (template, env)
+    return _templates[key][0].copy()
@@ -0,0 +1,160 @@
+"""
+mps_writer.py
+
+Write the mps and aux file of the bilevel minimum sudoku model directly from index arrays, without building a gurobi
+model first. The output is the same as the one of BilevelModel.generate_model_files (gurobi fixed format mps), so
+both can be compared byte by byte. A mps file whose name ends with .gz is written gzip compressed.
+"""
+import gzip
+
+import numpy as np
+import scipy.sparse as sp
+
+from model_template import sudoku_constraint_blocks
+
+INTORG = "    MARKER    'MARKER'                 'INTORG'\n"
+INTEND = "    MARKER    'MARKER'                 'INTEND'\n"
+CHUNK = 4096
+
+
+def format_number(value):
+    """
+    Format a coefficient the way gurobi writes it, integral values without decimal point
+    """
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def open_output(path):
+    """
+    Open a file for writing text, gzip compressed if the name ends with .gz
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt")
+    return open(path, "w")
+
+
+def write_mps(fp, name, row_names, senses, rhs, matrix, objective, column_names, binary):
+    """
+    Stream a minimization problem in fixed mps format. matrix is a (rows, columns) sparse matrix, senses holds one of
+    "E", "L", "G" per row and binary flags the binary columns
+    """
+    rows = [row.ljust(8) for row in row_names]
+    matrix = sp.csc_matrix(matrix)
+    matrix.sort_indices()
+    fp.write(f'NAME {name}\nROWS\n N  OBJ\n')
+    for k in range(0, len(rows), CHUNK):
+        fp.write("".join(f' {sense}  {row}\n' for sense, row in zip(senses[k:k+CHUNK], rows[k:k+CHUNK])))
+    fp.write("COLUMNS\n")
+    integer = False
+    lines = []
+    for c, column in enumerate(column_names):
+        if binary[c] != integer:
+            lines.append(INTEND if integer else INTORG)
+            integer = binary[c]
+        column = column.ljust(8)
+        if objective[c] != 0:
+            lines.append(f'    {column}  OBJ       {format_number(objective[c])}\n')
+        start, end = matrix.indptr[c], matrix.indptr[c+1]
+        for row, value in zip(matrix.indices[start:end], matrix.data[start:end]):
+            lines.append(f'    {column}  {rows[row]}  {format_number(value)}\n')
+        if len(lines) >= CHUNK:
+            fp.write("".join(lines))
+            lines = []
+    if integer:
+        lines.append(INTEND)
+    fp.write("".join(lines))
+    fp.write("RHS\n")
+    fp.write("".join(f'    RHS1      {rows[row]}  {format_number(rhs[row])}\n' for row in np.flatnonzero(rhs)))
+    fp.write("BOUNDS\n")
+    fp.write("".join(f' BV BND1      {column.ljust(8)}\n' for column, flag in zip(column_names, binary) if flag))
+    fp.write("ENDATA\n")
+
+
+def write_aux(fp, lower_columns, lower_rows, lower_objective, sense=1):
+    """
+    Write the auxillary file naming the lower level columns, rows and objective (sense 1 minimize, -1 maximize)
+    """
+    fp.write(f'N {len(lower_columns)}\n')
+    fp.write(f'M {len(lower_rows)}\n')
+    for i in lower_columns:
+        fp.write(f'LC {i}\n')
+    for i in lower_rows:
+        fp.write(f'LR {i}\n')
+    for i in lower_objective:
+        fp.write(f'LO {i}\n')
+    fp.write(f'OS {sense}')
+
+
+class BilevelInstanceWriter:
+
+    def __init__(self, geometry, given):
+        """
+        Build the part of the bilevel model of ProblemInstance.create_problem_instance_files that does not depend on
+        the unavoidable sets, the lower level sudoku and clue rows, the names and the bounds. given is the flat index
+        of the variable X[i,j,k] of the given digit of every cell. The same writer can write the model for any number
+        of unavoidable sets
+        """
+        self.n = n = geometry[0] * geometry[2]
+        cells = n*n
+        # Columns: X (n**3), M, Y (n**2)
+        m_column = n**3
+        self.y_columns = m_column + 1 + np.arange(cells)
+        self.n_columns = n_columns = n**3 + 1 + cells
+        blocks = sudoku_constraint_blocks(*geometry)
+        row_names = [row for _, _, names in blocks for row in names]
+        matrix_blocks = [sp.hstack([block, sp.csr_matrix((block.shape[0], 1 + cells))]) for _, block, _ in blocks]
+        cell_index = np.arange(cells)
+        # P: X[i,j,k] - Y[i,j] >= 0 for the given digit k
+        matrix_blocks.append(sp.csr_matrix((np.concatenate([np.ones(cells), -np.ones(cells)]),
+                                            (np.concatenate([cell_index, cell_index]),
+                                             np.concatenate([given, self.y_columns]))),
+                                           shape=(cells, n_columns)))
+        row_names += [f'P[{i},{j}]' for i in range(n) for j in range(n)]
+        # N: sum of the given digits - M <= n*n - 1, B: M >= 1, LLO: M >= 0
+        matrix_blocks.append(sp.csr_matrix((np.concatenate([np.ones(cells), [-1.0]]),
+                                            (np.zeros(cells + 1, dtype=int), np.append(given, m_column))),
+                                           shape=(1, n_columns)))
+        matrix_blocks.append(sp.csr_matrix(([1.0, 1.0], ([0, 1], [m_column, m_column])), shape=(2, n_columns)))
+        row_names += ["N", "B", "LLO"]
+        self.n_lower_rows = len(row_names) - 2
+        self.matrix = sp.vstack(matrix_blocks, format="csr")
+        self.row_names = row_names
+        n_sudoku_rows = len(row_names) - cells - 3
+        self.senses = ["E"]*n_sudoku_rows + ["G"]*cells + ["L", "G", "G"]
+        self.rhs = np.concatenate([np.ones(n_sudoku_rows), np.zeros(cells), [cells - 1, 1, 0]])
+        self.objective = np.zeros(n_columns)
+        self.objective[self.y_columns] = 1
+        self.column_names = [f'X[{i},{j},{k}]' for i in range(n) for j in range(n) for k in range(n)] + ["M"] \
+            + [f'Y[{i},{j}]' for i in range(n) for j in range(n)]
+
+    def write(self, mps_file, aux_file, name, bitsets, symmetry_pairs=()):
+        """
+        Write the model with the hitting set rows U of the (cuts, n*n) boolean matrix bitsets and the upper level
+        symmetry breaking rows SB, Y[c] - Y[d] >= 0 for every pair (c, d) of flat cells in symmetry_pairs
+        """
+        cut_rows, cut_cells = np.nonzero(bitsets)
+        cut_matrix = sp.csr_matrix((np.ones(len(cut_rows)), (cut_rows, self.y_columns[cut_cells])),
+                                   shape=(len(bitsets), self.n_columns))
+        pairs = np.array(symmetry_pairs, dtype=np.int64).reshape(-1, 2)
+        symmetry_matrix = sp.csr_matrix((np.tile([1.0, -1.0], len(pairs)),
+                                         (np.repeat(np.arange(len(pairs)), 2), self.y_columns[pairs.ravel()])),
+                                        shape=(len(pairs), self.n_columns))
+        matrix = sp.vstack([self.matrix, cut_matrix, symmetry_matrix], format="csc")
+        row_names = self.row_names + [f'U{i}' for i in range(len(bitsets))] + [f'SB{i}' for i in range(len(pairs))]
+        senses = self.senses + ["G"]*(len(bitsets) + len(pairs))
+        rhs = np.concatenate([self.rhs, np.ones(len(bitsets)), np.zeros(len(pairs))])
+        with open_output(mps_file) as fp:
+            write_mps(fp, name, row_names, senses, rhs, matrix, self.objective, self.column_names,
+                      [True]*self.n_columns)
+        with open(aux_file, "w") as fp:
+            write_aux(fp, range(self.n**3 + 1), range(self.n_lower_rows), [0.0]*self.n**3 + [1.0])
+
+
+def write_bilevel_instance(mps_file, aux_file, name, geometry, given, bitsets, symmetry_pairs=()):
+    """
+    Write the bilevel model of ProblemInstance.create_problem_instance_files. given is the flat index of the variable
+    X[i,j,k] of the given digit of every cell, bitsets the (cuts, n*n) boolean matrix of the unavoidable sets and
+    symmetry_pairs the cell pairs of the symmetry breaking rows
+    """
+    BilevelInstanceWriter(geometry, given).write(mps_file, aux_file, name, bitsets, symmetry_pairs)
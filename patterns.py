@@ -0,0 +1,116 @@
+"""
+patterns.py
+
+Enumerate small unavoidable sets directly from the structure of a solved grid without solving an ILP.
+
+Two families are searched:
+ - Line pair cycles. Take two rows (or two columns) of the grid and follow the permutation that maps the digit of the
+   first line in some column to the column where the first line holds the digit of the second line. Every cycle of
+   this permutation is a set of cells whose digits can be swapped between the two lines. It is unavoidable if the two
+   lines lie in the same band (stack) or if the cycle stays within one stack (band). A cycle of length 2 is a deadly
+   rectangle of size 4, a cycle of length 3 is a set of size 6.
+ - Digit pair swaps. Swapping two digits a and b in a set of cells is valid if every row, column and box meets the set
+   either not at all or in exactly one a and one b. The minimal such sets are the connected components of the graph
+   joining each a-cell to the b-cell in the same row, column and box.
+
+Every unavoidable set of size at most 6 belongs to one of these families, so the enumeration is complete up to that
+size. Larger sets found here are still valid but other shapes exist.
+"""
+import numpy as np
+
+COMPLETE_SIZE = 6
+
+
+def line_pair_cycles(board, sub_matrix_width, sub_matrix_height, max_size):
+    """
+    Find all unavoidable sets of size at most max_size formed by a cycle between two rows or two columns
+    """
+    board = np.asarray(board, dtype=np.int64) - 1
+    cuts = []
+    # Rows are grouped in bands of sub_matrix_height, the cells of a row are grouped in stacks of sub_matrix_width
+    for lines, line_group, cell_group, transpose in ((board, sub_matrix_height, sub_matrix_width, False),
+                                                     (board.T, sub_matrix_width, sub_matrix_height, True)):
+        n = lines.shape[0]
+        first, second = np.triu_indices(n, k=1)
+        # position[l, d] is the index of digit d in line l
+        position = np.argsort(lines, axis=1)
+        # Following the cycle from index c goes to the index where the first line holds the digit of the second line
+        successor = position[first[:, None], lines[second]]
+        index = np.arange(n)
+        current = np.broadcast_to(index, successor.shape).copy()
+        cycle_min = current.copy()
+        cycle_len = np.zeros(successor.shape, dtype=np.int64)
+        rows = np.arange(len(first))[:, None]
+        for length in range(1, max_size // 2 + 1):
+            current = successor[rows, current]
+            closed = (cycle_len == 0) & (current == index)
+            cycle_len[closed] = length
+            cycle_min = np.minimum(cycle_min, current)
+        # Report every cycle once, from its smallest index
+        pairs, starts = np.nonzero((cycle_len >= 2) & (cycle_min == index))
+        for pair, start in zip(pairs, starts):
+            cycle = [start]
+            while successor[pair, cycle[-1]] != start:
+                cycle.append(successor[pair, cycle[-1]])
+            l1, l2 = first[pair], second[pair]
+            if l1 // line_group != l2 // line_group and len({c // cell_group for c in cycle}) > 1:
+                continue
+            cells = [(l, c) for l in (l1, l2) for c in cycle]
+            if transpose:
+                cells = [(c, l) for l, c in cells]
+            cuts.append(sorted((int(i), int(j)) for i, j in cells))
+    return cuts
+
+
+def digit_pair_swaps(board, sub_matrix_width, sub_matrix_height, max_size):
+    """
+    Find all minimal unavoidable sets of size at most max_size made of two digits swapped with each other
+    """
+    board = np.asarray(board, dtype=np.int64) - 1
+    n = board.shape[0]
+    # column[i, d] is the column of digit d in row i
+    column = np.argsort(board, axis=1)
+    box = (np.arange(n)[:, None] // sub_matrix_height) * (n // sub_matrix_width) + np.arange(n)[None, :] // sub_matrix_width
+    cuts = []
+    for a in range(n):
+        for b in range(a+1, n):
+            # Node i is the a-cell of row i, node n+i is the b-cell of row i
+            cells = [(i, int(column[i, a])) for i in range(n)] + [(i, int(column[i, b])) for i in range(n)]
+            parent = list(range(2*n))
+
+            def find(u):
+                while parent[u] != u:
+                    parent[u] = parent[parent[u]]
+                    u = parent[u]
+                return u
+
+            def join(u, v):
+                parent[find(u)] = find(v)
+
+            col_of_b = {}
+            box_of_b = {}
+            for i in range(n):
+                col_of_b[cells[n+i][1]] = n+i
+                box_of_b[box[cells[n+i]]] = n+i
+            for i in range(n):
+                join(i, n+i)
+                join(i, col_of_b[cells[i][1]])
+                join(i, box_of_b[box[cells[i]]])
+            components = {}
+            for u in range(2*n):
+                components.setdefault(find(u), []).append(cells[u])
+            for component in components.values():
+                if len(component) <= max_size:
+                    cuts.append(sorted(component))
+    return cuts
+
+
+def find_pattern_sets(board, sub_matrix_width, sub_matrix_height, max_size):
+    """
+    Find the unavoidable sets of size at most max_size in both families, without duplicates and ordered by size
+    """
+    unique = {}
+    for cut in (line_pair_cycles(board, sub_matrix_width, sub_matrix_height, max_size)
+                + digit_pair_swaps(board, sub_matrix_width, sub_matrix_height, max_size)):
+        unique.setdefault(frozenset(cut), cut)
+    return sorted(unique.values(), key=lambda cut: (len(cut), cut))
@@ -0,0 +1,108 @@
+"""
+puzzle_file.py
+
+Read instance files into numpy arrays and solve whole collections of puzzles with the bitmask solver.
+
+Grids are encoded with 1-9, A-F and 0 for the numbers 1-16. An empty cell is "." or, on boards smaller than 16x16, "0"
+(or any other label larger than the side length). In the arrays an empty cell is 0.
+"""
+import multiprocessing
+
+import numpy as np
+from sudoku_solver import BitmaskSolver
+
+LABELS = "_123456789ABCDEF0"
+
+
+def read_instance_file(instance_file):
+    """
+    Stream (id, grid) pairs from an instance file. Files with an "Id Sudoku Grid" header hold one id and grid per line,
+    other files hold one grid per line and the line number is used as id
+    """
+    with open(instance_file) as fp:
+        first = fp.readline()
+        if first.split()[:1] == ["Id"]:
+            for line in fp:
+                if line.strip():
+                    grid_id, grid = line.split()[:2]
+                    yield grid_id, grid
+        else:
+            fp.seek(0)
+            for number, line in enumerate(fp):
+                if line.strip():
+                    yield str(number), line.strip()
+
+
+def label_table(n):
+    """
+    Get the lookup table from the byte of a label to its number on a board of side length n
+    """
+    table = np.zeros(256, dtype=np.uint8)
+    for number, label in enumerate(LABELS):
+        if 0 < number <= n:
+            table[ord(label)] = number
+            table[ord(label.lower())] = number
+    return table
+
+
+def parse_grids(grids, n):
+    """
+    Parse a list of grid strings of length n*n into an (N, n, n) uint8 array
+    """
+    raw = np.frombuffer("".join(grids).encode("ascii"), dtype=np.uint8)
+    if raw.size != len(grids)*n*n:
+        bad = next(grid for grid in grids if len(grid) != n*n)
+        raise ValueError(f'Grid have invalid length. Actual: {len(bad)}. Should Be: {n*n}')
+    return label_table(n)[raw].reshape(len(grids), n, n)
+
+
+def load_puzzles(instance_file, n):
+    """
+    Read a whole instance file, return the list of ids and the (N, n, n) uint8 array of its grids
+    """
+    ids, grids = [], []
+    for grid_id, grid in read_instance_file(instance_file):
+        ids.append(grid_id)
+        grids.append(grid)
+    return ids, parse_grids(grids, n)
+
+
+def format_grid(grid):
+    """
+    Get the string of a grid array, empty cells are written as "."
+    """
+    return "".join(LABELS[v] if v else "." for v in np.asarray(grid).ravel())
+
+
+_solver = None
+
+
+def _init_solver(geometry):
+    global _solver
+    _solver = BitmaskSolver(*geometry)
+
+
+def _solve(grid):
+    solutions = _solver.find_solutions(grid, limit=1)
+    return solutions[0] if solutions else None
+
+
+def solve_puzzles(puzzles, sub_matrix_width=3, sub_matrix_height=3, board_width=3, board_height=3, workers=1):
+    """
+    Solve an (N, n, n) array of puzzles by propagation and backtracking. Return the (N, n, n) array of solved grids and
+    a boolean array marking the unsolvable puzzles, whose rows are left as they were
+    """
+    geometry = (sub_matrix_width, sub_matrix_height, board_width, board_height)
+    flat = np.asarray(puzzles).reshape(len(puzzles), -1).tolist()
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=_init_solver, initargs=(geometry,)) as pool:
+            solutions = pool.map(_solve, flat, chunksize=max(1, len(flat) // (16*workers)))
+    else:
+        _init_solver(geometry)
+        solutions = [_solve(grid) for grid in flat]
+    solved = np.array(puzzles, dtype=np.uint8, copy=True)
+    failed = np.array([solution is None for solution in solutions], dtype=bool)
+    for k, solution in enumerate(solutions):
+        if solution is not None:
+            solved[k] = np.array(solution, dtype=np.uint8).reshape(solved.shape[1:])
+    return solved, failed
@@ -0,0 +1,78 @@
+"""
+set_cache.py
+
+An on-disk cache of unavoidable sets keyed by the canonical form of a grid (see symmetry.canonical_form). The sets are
+stored in canonical coordinates as cut files named by the hash of the canonical grid, so every grid equivalent to a
+cached one can reuse its sets. The total size of the cache is capped, the least recently used files are evicted.
+"""
+import hashlib
+import os
+
+from cut_store import read_header, read_cuts, write_cuts
+
+
+class SetCache:
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Open (and create) a cache in directory holding at most max_bytes of cut files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, canonical):
+        """
+        Get the cut file of a canonical grid given as an (n, n) array
+        """
+        key = hashlib.sha256("".join(f'{v},' for v in canonical.ravel().tolist()).encode()).hexdigest()
+        return os.path.join(self.directory, f'{key}.cuts')
+
+    def load(self, canonical, n_cuts):
+        """
+        Get the first n_cuts cached sets of a canonical grid, None if fewer sets are cached
+        """
+        path = self.path(canonical)
+        if not os.path.exists(path) or read_header(path)[1] < n_cuts:
+            return None
+        # The modification time orders the files for eviction
+        os.utime(path)
+        return read_cuts(path, n_cuts)
+
+    def store(self, canonical, cuts):
+        """
+        Cache the sets of a canonical grid unless more sets are cached already, then evict the least recently used
+        files until the cache fits into max_bytes
+        """
+        path = self.path(canonical)
+        if os.path.exists(path) and read_header(path)[1] >= len(cuts):
+            os.utime(path)
+            return
+        # Workers of a batch run may store the same grid at once, each writes its own file and renames it
+        temporary = f'{path}.{os.getpid()}.tmp'
+        write_cuts(temporary, cuts, canonical.shape[0])
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used cut files until the cache fits into max_bytes
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".cuts"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Evicted by another worker
+                pass
+            total -= size
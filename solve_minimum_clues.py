@@ -0,0 +1,35 @@
+"""
+solve_minimum_clues.py
+
+Solve the minimum clue problem of a grid directly by branch and cut over the unavoidable sets instead of exporting a
+bilevel mps file.
+"""
+import argparse
+import os
+
+import pandas as pd
+from instance import ProblemInstance
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-g","--grid",type=str, required=True, help="The sudoku grid (or puzzle with . for empty cells) to be solved")
+    parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
+    parser.add_argument("-n","--num_sets",type=int, required=False, help="The number of unavoidable sets to start with", default=None)
+    parser.add_argument("-c","--cut_file",type=str, required=False, help="Start with the sets of ./unavoidable_sets/<CUT_FILE>.cuts, without it every set is found lazily")
+    parser.add_argument("-l","--time_limit",type=float, required=False, help="The time limit in seconds", default=None)
+    parser.add_argument("--threads",type=int, required=False, help="The number of gurobi threads", default=None)
+    parser.add_argument("-o","--output",type=str, required=True, help="The name of the instance. The result row is appended to ./results/<OUTPUT>.csv")
+    args = parser.parse_args()
+
+    print(f'Solving Minimum Clue Problem for grid {args.grid}')
+    if not os.path.exists("./results"):
+        os.mkdir("./results")
+    instance = ProblemInstance(f'{args.output}', args.size, args.size, args.size, args.size)
+    instance.fit(args.grid, solve="." in args.grid)
+    if args.cut_file:
+        instance.load_cuts(f'./unavoidable_sets/{args.cut_file}.cuts', args.num_sets)
+    result = instance.solve_minimum_clues(time_limit=args.time_limit, threads=args.threads)
+    result_file = f'./results/{args.output}.csv'
+    pd.DataFrame([result]).to_csv(result_file, mode="a", header=not os.path.exists(result_file), index=False)
+    print(f'Best Solution {result["best_solution"]}, Lower Bound {result["lower bound"]}, '
+          f'Elapsed Time {result["runtime"]:.2f} s')
@@ -0,0 +1,30 @@
+"""
+solve_puzzles.py
+
+Solve every puzzle of an instance file and write the solved grids as an "Id Sudoku Grid" instance file.
+"""
+import argparse
+import time
+
+import numpy as np
+from puzzle_file import load_puzzles, solve_puzzles, format_grid
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i","--instance_file",type=str, required=True, help="The instance file with one puzzle per line")
+    parser.add_argument("-s","--size",type=int, required=False, help="The length of each subgrid", default=3)
+    parser.add_argument("-w","--workers",type=int, required=False, help="The number of worker processes", default=1)
+    parser.add_argument("-o","--output",type=str, required=True, help="The instance file the solved grids are written to")
+    args = parser.parse_args()
+
+    start = time.time()
+    ids, puzzles = load_puzzles(args.instance_file, args.size**2)
+    print(f'Loaded {len(ids)} puzzles in {time.time() - start:.2f} s', flush=True)
+    solved, failed = solve_puzzles(puzzles, args.size, args.size, args.size, args.size, workers=args.workers)
+    with open(args.output, "w") as fp:
+        fp.write("Id Sudoku Grid\n")
+        for k in np.flatnonzero(~failed):
+            fp.write(f'{ids[k]} {format_grid(solved[k])}\n')
+    for k in np.flatnonzero(failed):
+        print(f'Puzzle {ids[k]} not solvable')
+    print(f'Solved {len(ids) - failed.sum()} puzzles. Elapsed Time {time.time() - start:.2f} s')
@@ -0,0 +1,163 @@
+"""
+sudoku_solver.py
+
+A combinatorial sudoku solver based on row/column/box bitmasks. It is used to count the solutions of a partially filled
+grid (stopping as soon as enough solutions are found) without building a gurobi model
+"""
+from geometry import board_geometry
+
+
+class BitmaskSolver:
+
+    def __init__(self,
+                 sub_matrix_width=3,
+                 sub_matrix_height=3,
+                 board_width=3,
+                 board_height=3):
+        """
+        Precompute the unit membership of every cell for the given sub matrix and board sizes
+        """
+        geometry = board_geometry(sub_matrix_width, sub_matrix_height, board_width, board_height)
+        self.n = geometry.n
+        self.full = (1 << self.n) - 1
+        # Plain lists index faster than numpy arrays in the search loop
+        self.cell_row = geometry.cell_row.tolist()
+        self.cell_col = geometry.cell_col.tolist()
+        self.cell_box = geometry.cell_box.tolist()
+        self.units = geometry.units.tolist()
+
+    def find_solutions(self, grid, limit=2):
+        """
+        Return up to limit solutions of a grid given as a flat sequence of n*n numbers where 0 denotes an empty cell
+        """
+        n = self.n
+        full = self.full
+        cell_row = self.cell_row
+        cell_col = self.cell_col
+        cell_box = self.cell_box
+        units = self.units
+        values = [int(v) for v in grid]
+        if len(values) != n*n:
+            raise ValueError(f'Grid have invalid length. Actual: {len(values)}. Should Be: {n*n}')
+        rows = [0]*n
+        cols = [0]*n
+        boxes = [0]*n
+        for cell, v in enumerate(values):
+            if v:
+                bit = 1 << (v-1)
+                r, c, b = cell_row[cell], cell_col[cell], cell_box[cell]
+                if (rows[r] | cols[c] | boxes[b]) & bit:
+                    # The given clues already contradict each other
+                    return []
+                rows[r] |= bit
+                cols[c] |= bit
+                boxes[b] |= bit
+        solutions = []
+
+        def assign(cell, bit, trail):
+            values[cell] = bit.bit_length()
+            rows[cell_row[cell]] |= bit
+            cols[cell_col[cell]] |= bit
+            boxes[cell_box[cell]] |= bit
+            trail.append((cell, bit))
+
+        def undo(trail):
+            for cell, bit in trail:
+                values[cell] = 0
+                rows[cell_row[cell]] ^= bit
+                cols[cell_col[cell]] ^= bit
+                boxes[cell_box[cell]] ^= bit
+
+        def candidates(cell):
+            return full & ~(rows[cell_row[cell]] | cols[cell_col[cell]] | boxes[cell_box[cell]])
+
+        def propagate(trail):
+            """
+            Fill naked and hidden singles until nothing changes, return False on contradiction
+            """
+            changed = True
+            while changed:
+                changed = False
+                for cell in range(n*n):
+                    if values[cell] == 0:
+                        cand = candidates(cell)
+                        if cand == 0:
+                            return False
+                        if cand & (cand-1) == 0:
+                            assign(cell, cand, trail)
+                            changed = True
+                for unit in units:
+                    once = 0
+                    twice = 0
+                    used = 0
+                    for cell in unit:
+                        if values[cell]:
+                            used |= 1 << (values[cell]-1)
+                        else:
+                            cand = candidates(cell)
+                            twice |= once & cand
+                            once |= cand
+                    if once | used != full:
+                        # Some digit can not be placed anywhere in this unit
+                        return False
+                    single = once & ~twice
+                    while single:
+                        bit = single & -single
+                        single ^= bit
+                        for cell in unit:
+                            if values[cell] == 0 and candidates(cell) & bit:
+                                assign(cell, bit, trail)
+                                changed = True
+                                break
+                        else:
+                            return False
+            return True
+
+        def search():
+            """
+            Depth first search choosing the cell with minimum remaining values, return True once limit is reached
+            """
+            trail = []
+            if not propagate(trail):
+                undo(trail)
+                return False
+            best = -1
+            best_cand = 0
+            best_count = n+1
+            for cell in range(n*n):
+                if values[cell] == 0:
+                    cand = candidates(cell)
+                    count = cand.bit_count()
+                    if count < best_count:
+                        best, best_cand, best_count = cell, cand, count
+            if best == -1:
+                solutions.append(list(values))
+                undo(trail)
+                return len(solutions) >= limit
+            while best_cand:
+                bit = best_cand & -best_cand
+                best_cand ^= bit
+                branch = []
+                assign(best, bit, branch)
+                done = search()
+                undo(branch)
+                if done:
+                    undo(trail)
+                    return True
+            undo(trail)
+            return False
+
+        search()
+        return solutions
+
+    def count_solutions(self, grid, limit=2):
+        """
+        Count the solutions of a grid, stop counting once limit is reached
+        """
+        return len(self.find_solutions(grid, limit))
+
+    def is_unique(self, grid):
+        """
+        Check if a grid have exactly one solution
+        """
+        return self.count_solutions(grid, 2) == 1
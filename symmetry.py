@@ -0,0 +1,213 @@
+"""
+symmetry.py
+
+Compute the automorphism group of a solved sudoku grid. An automorphism is a validity preserving transformation of
+the board (band and stack permutations, row permutations within a band, column permutations within a stack and, for
+square sub matrices, transposition) that maps the grid onto itself up to a relabeling of the digits. Unavoidable sets
+are mapped to unavoidable sets by every automorphism.
+
+The same transformations map every grid to a canonical representative of its equivalence class, so equivalent grids
+can share their unavoidable sets.
+"""
+import itertools
+import math
+
+import numpy as np
+
+
+class Automorphism:
+
+    def __init__(self, cells, digits, transpose):
+        """
+        Store an automorphism. cells maps every flat cell index to the flat index of its image and digits maps every
+        digit (starting from 0) to its relabeled digit
+        """
+        self.cells = cells
+        self.digits = digits
+        self.transpose = transpose
+
+    def inverse(self):
+        """
+        Get the transformation that undoes this one
+        """
+        return Automorphism(np.argsort(self.cells), np.argsort(self.digits), self.transpose)
+
+    def is_identity(self):
+        return bool(np.all(self.cells == np.arange(len(self.cells))))
+
+    def map_cut(self, cut, n):
+        """
+        Map an unavoidable set given as a list of (i, j) cells to its image
+        """
+        return sorted(divmod(int(self.cells[i*n+j]), n) for i, j in cut)
+
+
+def grid_automorphisms(board, sub_matrix_width, sub_matrix_height, board_width, board_height):
+    """
+    Find all automorphisms of a solved grid, including the identity.
+
+    An automorphism maps the rows by R and the columns by C (after an optional transposition H of the grid G) such
+    that H[R[i], C[j]] = sigma(G[i, j]) for a digit relabeling sigma. Choosing the images of the rows and columns of
+    the top left box fixes sigma, since the box holds every digit. Row 0 then determines C and column 0 determines R,
+    so only the choices for the top left box have to be enumerated.
+    """
+    grid = np.asarray(board, dtype=np.int64) - 1
+    n = grid.shape[0]
+    transposes = [False]
+    if sub_matrix_width == sub_matrix_height and board_width == board_height:
+        transposes.append(True)
+    automorphisms = []
+    for transpose in transposes:
+        target = grid.T if transpose else grid
+        # Digit positions in the target grid, row_position[r, d] is the column of digit d in row r
+        row_position = np.argsort(target, axis=1)
+        col_position = np.argsort(target, axis=0).T
+        row_orders = [[band*sub_matrix_height + r for r in order]
+                      for band in range(board_height)
+                      for order in itertools.permutations(range(sub_matrix_height))]
+        col_orders = [[stack*sub_matrix_width + c for c in order]
+                      for stack in range(board_width)
+                      for order in itertools.permutations(range(sub_matrix_width))]
+        box = grid[:sub_matrix_height, :sub_matrix_width].ravel()
+        for rows in row_orders:
+            for cols in col_orders:
+                digits = np.empty(n, dtype=np.int64)
+                digits[box] = target[np.ix_(rows, cols)].ravel()
+                col_map = row_position[rows[0], digits[grid[0]]]
+                row_map = col_position[col_map[0], digits[grid[:, 0]]]
+                if not _is_structured(row_map, sub_matrix_height, board_height):
+                    continue
+                if not _is_structured(col_map, sub_matrix_width, board_width):
+                    continue
+                if not np.array_equal(target[np.ix_(row_map, col_map)], digits[grid]):
+                    continue
+                if transpose:
+                    cells = col_map[None, :]*n + row_map[:, None]
+                else:
+                    cells = row_map[:, None]*n + col_map[None, :]
+                automorphisms.append(Automorphism(cells.ravel(), digits, transpose))
+    return automorphisms
+
+
+def _is_structured(line_map, group_size, group_count):
+    """
+    Check if a line mapping is a permutation that moves the groups of lines (bands or stacks) as a whole
+    """
+    groups = line_map.reshape(group_count, group_size) // group_size
+    if not np.all(groups == groups[:, :1]):
+        return False
+    return len(set(groups[:, 0].tolist())) == group_count
+
+
+def cut_orbit(cut, automorphisms, n):
+    """
+    Get the distinct images of an unavoidable set under a list of automorphisms
+    """
+    images = {}
+    for automorphism in automorphisms:
+        image = automorphism.map_cut(cut, n)
+        images.setdefault(frozenset(image), image)
+    return list(images.values())
+
+
+def symmetry_breaking_pairs(automorphisms):
+    """
+    Get the distinct pairs (c, d) of flat cells such that Y[c] >= Y[d] is the first component of the lex leader
+    constraint Y >=lex Y o pi of an automorphism pi, with c the first cell moved by pi and d its image. The clue set of
+    every orbit that is largest in the lexicographic order over the cells satisfies all of them at once
+    """
+    pairs = set()
+    for automorphism in automorphisms:
+        moved = np.flatnonzero(automorphism.cells != np.arange(len(automorphism.cells)))
+        if len(moved):
+            pairs.add((int(moved[0]), int(automorphism.cells[moved[0]])))
+    return sorted(pairs)
+
+
+def lex_leader(cells, automorphisms, n):
+    """
+    Get the image of a clue set, given as (i, j) cells, that is largest in the lexicographic order over the cells
+    """
+    def key(cut):
+        y = np.zeros(n*n, dtype=np.int8)
+        y[[i*n + j for i, j in cut]] = 1
+        return y.tolist()
+    return max([sorted(cells)] + [automorphism.map_cut(cells, n) for automorphism in automorphisms], key=key)
+
+
+# Largest number of column orders that canonical_form enumerates, 1296 for 9x9 grids but 24**5 for 16x16 grids
+CANONICAL_LIMIT = 50000
+
+
+def column_orders(sub_matrix_width, board_width):
+    """
+    Get all column orders that move the stacks as a whole, one order per row of the array
+    """
+    stacks = list(itertools.permutations(range(board_width)))
+    within = list(itertools.permutations(range(sub_matrix_width)))
+    orders = []
+    for stack_order in stacks:
+        for inner in itertools.product(within, repeat=board_width):
+            orders.append([stack*sub_matrix_width + c for stack, order in zip(stack_order, inner) for c in order])
+    return np.array(orders, dtype=np.int64)
+
+
+def canonical_form(board, sub_matrix_width, sub_matrix_height, board_width, board_height):
+    """
+    Get the canonical representative of a solved grid and the transformation (an Automorphism object, whose map_cut
+    maps sets of the board to sets of the canonical grid) that produces it. Equivalent grids have the same canonical
+    grid.
+
+    The canonical grid is the lexicographically smallest grid (read row by row) among all transformations. Its first row
+    is always 1..n: for every choice of transposition, first row and column order the digits are relabeled to make it
+    so, and the remaining rows are then sorted within their bands and the bands by their first row. Grids with more
+    than CANONICAL_LIMIT column orders are not canonicalized, the board itself is returned with the identity
+    """
+    grid = np.asarray(board, dtype=np.int64) - 1
+    n = grid.shape[0]
+    count = math.factorial(board_width) * math.factorial(sub_matrix_width)**board_width
+    if count > CANONICAL_LIMIT or n**n >= 2**63:
+        return grid.astype(np.uint8) + 1, Automorphism(np.arange(n*n), np.arange(n), False)
+    orders = column_orders(sub_matrix_width, board_width)
+    powers = n**np.arange(n-1, -1, -1, dtype=np.int64)
+    transposes = [False]
+    if sub_matrix_width == sub_matrix_height and board_width == board_height:
+        transposes.append(True)
+    best = None
+    for transpose in transposes:
+        target = grid.T if transpose else grid
+        # columns[p, i, c] is the digit in row i and column orders[p, c]
+        columns = target[:, orders].transpose(1, 0, 2)
+        for first in range(n):
+            relabel = np.argsort(columns[:, first, :], axis=1)
+            relabeled = np.take_along_axis(relabel[:, None, :], columns, axis=2)
+            # Rows are compared by their base n value, sorting the values sorts the rows lexicographically
+            keys = relabeled @ powers
+            rows = np.empty((len(orders), n), dtype=np.int64)
+            first_band = first // sub_matrix_height
+            band_rows = np.arange(n).reshape(board_height, sub_matrix_height)
+            rest = band_rows[first_band][band_rows[first_band] != first]
+            rows[:, 0] = first
+            rows[:, 1:sub_matrix_height] = rest[np.argsort(keys[:, rest], axis=1)]
+            other = np.delete(band_rows, first_band, axis=0)
+            other_rows = other[None, :, :].repeat(len(orders), axis=0)
+            other_rows = np.take_along_axis(other_rows, np.argsort(keys[:, other], axis=2), axis=2)
+            band_order = np.argsort(np.take_along_axis(keys[:, None, :], other_rows[:, :, 0][:, :, None], axis=2)
+                                    [:, :, 0], axis=1)
+            other_rows = np.take_along_axis(other_rows, band_order[:, :, None], axis=1)
+            rows[:, sub_matrix_height:] = other_rows.reshape(len(orders), -1)
+            sequences = np.take_along_axis(keys, rows, axis=1)
+            p = np.lexsort(sequences.T[::-1])[0]
+            if best is None or tuple(sequences[p]) < best[0]:
+                best = (tuple(sequences[p]), transpose, rows[p], orders[p], relabel[p])
+    _, transpose, rows, cols, relabel = best
+    canonical_cells = np.arange(n*n).reshape(n, n)
+    cells = np.empty(n*n, dtype=np.int64)
+    if transpose:
+        cells[(cols[None, :]*n + rows[:, None]).ravel()] = canonical_cells.ravel()
+    else:
+        cells[(rows[:, None]*n + cols[None, :]).ravel()] = canonical_cells.ravel()
+    transform = Automorphism(cells, relabel, transpose)
+    canonical = np.empty(n*n, dtype=np.uint8)
+    canonical[cells] = relabel[grid.ravel()] + 1
+    return canonical.reshape(n, n), transform